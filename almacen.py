@@ -0,0 +1,681 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+from diario_evaluacion import DiarioEvaluacion, clave_noticia
+from fragmentos import RESPUESTA_FRAGMENTOS
+from lotes import RESPUESTA_LOTE
+from salida_json import normalizar_evaluacion
+
+logger = logging.getLogger(__name__)
+
+# Backend por defecto y rutas; ALMACEN=json conserva los archivos JSON/JSONL de siempre
+ALMACEN = os.getenv('ALMACEN', 'sqlite')
+RUTA_SQLITE = os.getenv('ALMACEN_SQLITE', './clean/noticias.db')
+
+
+# Función para calcular el hash con el que se detecta la misma noticia publicada con otra URL
+def hash_noticia(noticia):
+    contenido = f"{noticia.get('titulo', '')}\n{noticia.get('contenido', '')}"
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+# Función para quedarse con la fecha si está en ISO 8601; "Fecha no disponible" no debe entrar en los rangos
+def fecha_iso(noticia):
+    fecha = noticia.get("fecha")
+    return fecha if isinstance(fecha, str) and fecha[:4].isdigit() else None
+
+
+# Función para escribir noticias como la lista JSON con sangría que usan los scripts de evaluación, una a una
+def _escribir_lista_json(noticias, ruta):
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    temporal = ruta + '.tmp'
+    total = 0
+    with open(temporal, 'w', encoding='utf-8') as file:
+        file.write("[")
+        for noticia in noticias:
+            texto = json.dumps(noticia, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+            file.write(("," if total else "") + "\n    " + texto)
+            total += 1
+        file.write("\n]" if total else "]")
+    os.replace(temporal, ruta)
+    return total
+
+
+# Tipo de las respuestas guardadas que son la salida de un solo prompt; las demás son RESPUESTA_LOTE y
+# RESPUESTA_FRAGMENTOS. El tipo se guarda junto a la respuesta y decide cómo se interpreta al reprocesarla.
+RESPUESTA_SIMPLE = "simple"
+
+
+# Función para obtener (respuesta, tipo) de una respuesta guardada antes de que existiera el tipo: entonces
+# el objeto de una noticia evaluada en lote iba envuelto en {"lote": ...} y los fragmentos en {"fragmentos": [...]}
+def tipo_anterior(respuesta):
+    if respuesta.startswith('{"lote": '):
+        return json.dumps(json.loads(respuesta)["lote"], ensure_ascii=False), RESPUESTA_LOTE
+    if respuesta.startswith('{"fragmentos": '):
+        return respuesta, RESPUESTA_FRAGMENTOS
+    return respuesta, RESPUESTA_SIMPLE
+
+
+# Funciones para leer y escribir los archivos JSON auxiliares del almacén JSON
+def _leer_json(ruta, predeterminado):
+    if not os.path.exists(ruta):
+        return predeterminado
+    with open(ruta, 'r', encoding='utf-8') as file:
+        try:
+            return json.load(file)
+        except json.JSONDecodeError:
+            logger.warning(f"{ruta} no es un JSON válido, se ignora")
+            return predeterminado
+
+
+def _escribir_json(datos, ruta):
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as file:
+        json.dump(datos, file, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+# Función para armar la noticia exportada: con su evaluación o, si no la tiene, con la vacía y el motivo
+# por el que el triaje la omitió, para distinguirla de una evaluación fallida
+def _con_evaluacion(noticia, evaluacion, motivo_omision):
+    if evaluacion:
+        return dict(noticia, evaluacion=evaluacion)
+    if motivo_omision:
+        return dict(noticia, evaluacion=normalizar_evaluacion({}), omitida=motivo_omision)
+    return dict(noticia, evaluacion=normalizar_evaluacion({}))
+
+
+# Almacén sobre los archivos de siempre: noticias en JSON o JSONL, evaluaciones en el diario JSONL,
+# respuestas crudas del modelo en un JSONL comprimido con gzip, y las noticias omitidas por el triaje y
+# las frecuencias de términos del triaje en archivos JSON aparte.
+# Las consultas recorren el archivo completo; sirve para ejecuciones pequeñas o para no migrar.
+class AlmacenJSON:
+    def __init__(self, ruta_noticias='./clean/noticias_combinadas.jsonl', ruta_diario='./clean/noticias_con_evaluacion.jsonl',
+                 ruta_respuestas='./clean/respuestas_crudas.jsonl.gz', ruta_omitidas='./clean/omitidas_triaje.json',
+                 ruta_frecuencias='./clean/frecuencias_triaje.json'):
+        self.ruta = ruta_noticias
+        self.diario = DiarioEvaluacion(ruta_diario)
+        self.ruta_respuestas = ruta_respuestas
+        self.ruta_omitidas = ruta_omitidas
+        self.ruta_frecuencias = ruta_frecuencias
+        self._lock = threading.Lock()
+        self._respuestas = None
+
+    # Función para guardar noticias normalizadas; `reemplazar` descarta las anteriores
+    def guardar_noticias(self, noticias, reemplazar=False):
+        if self.ruta.endswith('.json'):
+            existentes = [] if reemplazar else list(self.iterar_noticias())
+            return _escribir_lista_json(existentes + list(noticias), self.ruta) - len(existentes)
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        total = 0
+        with open(self.ruta, 'w' if reemplazar else 'a', encoding='utf-8') as file:
+            for noticia in noticias:
+                file.write(json.dumps(noticia, ensure_ascii=False) + "\n")
+                total += 1
+        return total
+
+    def contar_noticias(self):
+        return sum(1 for _ in self.iterar_noticias())
+
+    # Generador de noticias con filtros opcionales: fuente, rango de fechas [desde, hasta) y
+    # `sin_evaluar=(version, modelo)` para obtener solo las que aún no tienen esa evaluación
+    def iterar_noticias(self, fuente=None, desde=None, hasta=None, sin_evaluar=None):
+        if not os.path.exists(self.ruta):
+            return
+        evaluadas = self.cargar_evaluaciones(*sin_evaluar) if sin_evaluar else {}
+        with open(self.ruta, 'r', encoding='utf-8') as file:
+            if self.ruta.endswith('.jsonl'):
+                noticias = (json.loads(linea) for linea in file if linea.strip())
+            else:
+                noticias = json.load(file)
+            for noticia in noticias:
+                fecha = fecha_iso(noticia)
+                if fuente and noticia.get("fuente") != fuente:
+                    continue
+                if (desde or hasta) and fecha is None:
+                    continue
+                if (desde and fecha < desde) or (hasta and fecha >= hasta):
+                    continue
+                if sin_evaluar and clave_noticia(noticia) in evaluadas:
+                    continue
+                yield noticia
+
+    # Función para obtener la fecha ISO más reciente de las noticias filtradas, sin guardarlas en memoria
+    def fecha_mas_reciente(self, **filtros):
+        return max(filter(None, map(fecha_iso, self.iterar_noticias(**filtros))), default=None)
+
+    # Función para obtener {clave de la noticia: evaluación} de una versión del prompt y un modelo
+    def cargar_evaluaciones(self, version, modelo):
+        return self.diario.cargar(version, modelo)
+
+    def guardar_evaluacion(self, noticia, evaluacion, version, modelo):
+        self.diario.registrar(noticia, evaluacion, version, modelo)
+
+    # Función para sustituir evaluaciones de una versión a partir de {clave: evaluación} (por ejemplo al reprocesar)
+    def reemplazar_evaluaciones(self, evaluaciones, version, modelo):
+        for clave, evaluacion in evaluaciones.items():
+            self.diario.registrar({}, evaluacion, version, modelo, clave=clave)
+
+    # Función para contar las evaluaciones guardadas por (versión, modelo), para comparar versiones
+    def contar_evaluaciones(self):
+        return self.diario.contar()
+
+    # Función para conservar la respuesta cruda del modelo, para reprocesarla sin volver a consultarlo
+    def guardar_respuesta(self, noticia, respuesta, version, modelo, tipo=RESPUESTA_SIMPLE):
+        linea = json.dumps({"clave": clave_noticia(noticia), "version": version, "modelo": modelo,
+                            "respuesta": respuesta, "tipo": tipo}, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._respuestas is None:
+                directorio = os.path.dirname(self.ruta_respuestas)
+                if directorio:
+                    os.makedirs(directorio, exist_ok=True)
+                self._respuestas = gzip.open(self.ruta_respuestas, 'at', encoding='utf-8')
+            self._respuestas.write(linea)
+
+    # Generador de (clave, respuesta, tipo) de una versión y un modelo; si una noticia tiene varias, vale la última
+    def iterar_respuestas(self, version, modelo):
+        # Se cierra el miembro gzip en curso para que quede completo; la próxima escritura abre otro
+        with self._lock:
+            if self._respuestas is not None:
+                self._respuestas.close()
+                self._respuestas = None
+        if not os.path.exists(self.ruta_respuestas):
+            return
+        respuestas = {}
+        with gzip.open(self.ruta_respuestas, 'rt', encoding='utf-8') as file:
+            try:
+                for linea in file:
+                    try:
+                        registro = json.loads(linea)
+                    except json.JSONDecodeError:
+                        continue
+                    if registro.get("version") == version and registro.get("modelo") == modelo:
+                        if "tipo" in registro:
+                            respuestas[registro["clave"]] = (registro["respuesta"], registro["tipo"])
+                        else:
+                            respuestas[registro["clave"]] = tipo_anterior(registro["respuesta"])
+            except (EOFError, gzip.BadGzipFile):
+                # Archivo cortado por una interrupción: se conserva lo leído hasta ahí
+                logger.warning(f"{self.ruta_respuestas} está incompleto; se usan las respuestas leídas")
+        for clave, (respuesta, tipo) in respuestas.items():
+            yield clave, respuesta, tipo
+
+    # Función para registrar el resultado del triaje de un bloque: las noticias `revisadas` dejan de figurar
+    # como omitidas y se guardan las `omitidas` [(noticia, motivo)] de esta ejecución
+    def guardar_omitidas(self, revisadas, omitidas, version, modelo):
+        todas = _leer_json(self.ruta_omitidas, {})
+        grupo = todas.setdefault(f"{version}|{modelo}", {})
+        for noticia in revisadas:
+            grupo.pop(clave_noticia(noticia), None)
+        for noticia, motivo in omitidas:
+            grupo[clave_noticia(noticia)] = motivo
+        _escribir_json(todas, self.ruta_omitidas)
+
+    # Función para obtener {clave de la noticia: motivo} de las omitidas por el triaje en una versión y un modelo
+    def cargar_omitidas(self, version, modelo):
+        return _leer_json(self.ruta_omitidas, {}).get(f"{version}|{modelo}", {})
+
+    # Frecuencias de términos del triaje guardadas por `clave`; valen mientras el archivo de noticias no cambie
+    def cargar_frecuencias(self, clave):
+        guardadas = _leer_json(self.ruta_frecuencias, {}).get(clave)
+        if not guardadas or guardadas["firma"] != self._firma_noticias():
+            return None
+        return guardadas["frecuencias"], guardadas["total"]
+
+    def guardar_frecuencias(self, clave, frecuencias, total):
+        todas = _leer_json(self.ruta_frecuencias, {})
+        todas[clave] = {"firma": self._firma_noticias(), "frecuencias": frecuencias, "total": total}
+        _escribir_json(todas, self.ruta_frecuencias)
+
+    def _firma_noticias(self):
+        if not os.path.exists(self.ruta):
+            return None
+        info = os.stat(self.ruta)
+        return [info.st_size, info.st_mtime]
+
+    # Función para exportar las noticias con su evaluación al formato de noticias_con_evaluacion.json;
+    # las omitidas por el triaje llevan además "omitida" con el motivo
+    def exportar_json(self, ruta, version, modelo, **filtros):
+        evaluaciones = self.cargar_evaluaciones(version, modelo)
+        omitidas = self.cargar_omitidas(version, modelo)
+        return _escribir_lista_json(
+            (_con_evaluacion(noticia, evaluaciones.get(clave_noticia(noticia)), omitidas.get(clave_noticia(noticia)))
+             for noticia in self.iterar_noticias(**filtros)),
+            ruta
+        )
+
+    def cerrar(self):
+        self.diario.cerrar()
+        with self._lock:
+            if self._respuestas is not None:
+                self._respuestas.close()
+                self._respuestas = None
+
+
+# Almacén SQLite: noticias indexadas por URL, hash, fuente y fecha, y evaluaciones y respuestas crudas
+# (comprimidas con zlib) por (noticia, versión, modelo). Usa WAL para que las lecturas no bloqueen las
+# escrituras, y agrupa las evaluaciones en transacciones.
+class AlmacenSQLite:
+    def __init__(self, ruta=RUTA_SQLITE, tamano_lote=50, intervalo=2.0):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.ruta = ruta
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._pendientes = []
+        self._ultimo_guardado = time.monotonic()
+
+        # La conexión se comparte entre hilos; el lock serializa su uso
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute("PRAGMA foreign_keys=ON")
+        self._crear_tablas()
+
+    def _crear_tablas(self):
+        with self._conexion:
+            self._conexion.executescript("""
+                CREATE TABLE IF NOT EXISTS noticias (
+                    clave TEXT PRIMARY KEY,
+                    url TEXT,
+                    hash TEXT NOT NULL,
+                    fuente TEXT,
+                    fecha TEXT,
+                    activa INTEGER NOT NULL DEFAULT 1,
+                    datos TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_noticias_url ON noticias(url);
+                CREATE INDEX IF NOT EXISTS idx_noticias_hash ON noticias(hash);
+                CREATE INDEX IF NOT EXISTS idx_noticias_fuente_fecha ON noticias(fuente, fecha);
+                CREATE INDEX IF NOT EXISTS idx_noticias_fecha ON noticias(fecha);
+
+                CREATE TABLE IF NOT EXISTS evaluaciones (
+                    clave TEXT NOT NULL REFERENCES noticias(clave),
+                    version TEXT NOT NULL,
+                    modelo TEXT NOT NULL,
+                    evaluacion TEXT NOT NULL,
+                    creada REAL NOT NULL,
+                    PRIMARY KEY (clave, version, modelo)
+                );
+
+                CREATE TABLE IF NOT EXISTS respuestas (
+                    clave TEXT NOT NULL REFERENCES noticias(clave),
+                    version TEXT NOT NULL,
+                    modelo TEXT NOT NULL,
+                    respuesta BLOB NOT NULL,
+                    tipo TEXT NOT NULL DEFAULT 'simple',
+                    creada REAL NOT NULL,
+                    PRIMARY KEY (clave, version, modelo)
+                );
+
+                -- Noticias que el triaje no envió al modelo en la última ejecución, con el motivo;
+                -- no cuentan como evaluadas, así que el triaje las vuelve a revisar cada vez
+                CREATE TABLE IF NOT EXISTS omitidas (
+                    clave TEXT NOT NULL REFERENCES noticias(clave),
+                    version TEXT NOT NULL,
+                    modelo TEXT NOT NULL,
+                    motivo TEXT NOT NULL,
+                    creada REAL NOT NULL,
+                    PRIMARY KEY (clave, version, modelo)
+                );
+
+                -- Frecuencias de términos del triaje (IDF) por filtros; se borran al cambiar las noticias
+                CREATE TABLE IF NOT EXISTS frecuencias_triaje (
+                    clave TEXT PRIMARY KEY,
+                    total INTEGER NOT NULL,
+                    frecuencias BLOB NOT NULL
+                );
+            """)
+            self._agregar_tipo_respuestas()
+
+    # Las bases creadas antes de la columna `tipo` de respuestas la reciben con el tipo que se deducía del texto
+    def _agregar_tipo_respuestas(self):
+        columnas = [fila[1] for fila in self._conexion.execute("PRAGMA table_info(respuestas)")]
+        if "tipo" in columnas:
+            return
+        self._conexion.execute("ALTER TABLE respuestas ADD COLUMN tipo TEXT NOT NULL DEFAULT 'simple'")
+        cambios = []
+        for rowid, datos in self._conexion.execute("SELECT rowid, respuesta FROM respuestas"):
+            respuesta, tipo = tipo_anterior(zlib.decompress(datos).decode('utf-8'))
+            if tipo != RESPUESTA_SIMPLE:
+                cambios.append((zlib.compress(respuesta.encode('utf-8')), tipo, rowid))
+        self._conexion.executemany("UPDATE respuestas SET respuesta = ?, tipo = ? WHERE rowid = ?", cambios)
+        logger.info(f"Columna tipo agregada a las respuestas guardadas ({len(cambios)} de lote o por fragmentos)")
+
+    # Función para guardar noticias normalizadas en una sola transacción.
+    # `reemplazar` desactiva las anteriores en vez de borrarlas, para no perder sus evaluaciones.
+    def guardar_noticias(self, noticias, reemplazar=False):
+        filas = [
+            (clave_noticia(noticia), noticia.get("url"), hash_noticia(noticia), noticia.get("fuente"),
+             fecha_iso(noticia), json.dumps(noticia, ensure_ascii=False))
+            for noticia in noticias
+        ]
+        with self._lock, self._conexion:
+            self._conexion.execute("DELETE FROM frecuencias_triaje")
+            if reemplazar:
+                self._conexion.execute("UPDATE noticias SET activa = 0")
+            self._conexion.executemany("""
+                INSERT INTO noticias (clave, url, hash, fuente, fecha, datos) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(clave) DO UPDATE SET
+                    url = excluded.url, hash = excluded.hash, fuente = excluded.fuente,
+                    fecha = excluded.fecha, datos = excluded.datos, activa = 1
+            """, filas)
+        return len(filas)
+
+    def contar_noticias(self):
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM noticias WHERE activa = 1").fetchone()[0]
+
+    # Función para armar la consulta de noticias con los mismos filtros que AlmacenJSON.iterar_noticias
+    def _consulta_noticias(self, columnas, fuente=None, desde=None, hasta=None, sin_evaluar=None):
+        condiciones = ["n.activa = 1"]
+        parametros = []
+        if fuente:
+            condiciones.append("n.fuente = ?")
+            parametros.append(fuente)
+        if desde:
+            condiciones.append("n.fecha >= ?")
+            parametros.append(desde)
+        if hasta:
+            condiciones.append("n.fecha < ?")
+            parametros.append(hasta)
+        if sin_evaluar:
+            condiciones.append("NOT EXISTS (SELECT 1 FROM evaluaciones e "
+                               "WHERE e.clave = n.clave AND e.version = ? AND e.modelo = ?)")
+            parametros.extend(sin_evaluar)
+        return f"SELECT {columnas} FROM noticias n WHERE {' AND '.join(condiciones)} ORDER BY n.rowid", parametros
+
+    # Generador de noticias filtradas en SQL; solo las filas pedidas se leen del disco
+    def iterar_noticias(self, fuente=None, desde=None, hasta=None, sin_evaluar=None):
+        self.guardar_pendientes()
+        consulta, parametros = self._consulta_noticias("n.datos", fuente, desde, hasta, sin_evaluar)
+        # Conexión de solo lectura aparte: en WAL no bloquea a quien escribe mientras se recorre
+        lectura = sqlite3.connect(f"file:{self.ruta}?mode=ro", uri=True)
+        try:
+            for (datos,) in lectura.execute(consulta, parametros):
+                yield json.loads(datos)
+        finally:
+            lectura.close()
+
+    def fecha_mas_reciente(self, fuente=None, desde=None, hasta=None, sin_evaluar=None):
+        self.guardar_pendientes()
+        consulta, parametros = self._consulta_noticias("MAX(n.fecha)", fuente, desde, hasta, sin_evaluar)
+        with self._lock:
+            return self._conexion.execute(consulta, parametros).fetchone()[0]
+
+    def cargar_evaluaciones(self, version, modelo):
+        self.guardar_pendientes()
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT clave, evaluacion FROM evaluaciones WHERE version = ? AND modelo = ?", (version, modelo)
+            ).fetchall()
+        return {clave: json.loads(evaluacion) for clave, evaluacion in filas}
+
+    def contar_evaluaciones(self):
+        self.guardar_pendientes()
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT version, modelo, COUNT(*) FROM evaluaciones GROUP BY version, modelo ORDER BY version, modelo"
+            ).fetchall()
+        return {(version, modelo): total for version, modelo, total in filas}
+
+    # Función para registrar una evaluación; se escribe junto con otras al llegar a `tamano_lote`
+    # o al pasar `intervalo` segundos, así una interrupción pierde como mucho un lote
+    def guardar_evaluacion(self, noticia, evaluacion, version, modelo):
+        fila = (clave_noticia(noticia), version, modelo, json.dumps(evaluacion, ensure_ascii=False), time.time())
+        self._encolar("evaluaciones", noticia, fila)
+
+    def guardar_respuesta(self, noticia, respuesta, version, modelo, tipo=RESPUESTA_SIMPLE):
+        fila = (clave_noticia(noticia), version, modelo, zlib.compress(respuesta.encode('utf-8')), tipo, time.time())
+        self._encolar("respuestas", noticia, fila)
+
+    def _encolar(self, tabla, noticia, fila):
+        with self._lock:
+            self._pendientes.append((tabla, noticia, fila))
+            lleno = len(self._pendientes) >= self.tamano_lote
+            vencido = time.monotonic() - self._ultimo_guardado >= self.intervalo
+        if lleno or vencido:
+            self.guardar_pendientes()
+
+    def guardar_pendientes(self):
+        with self._lock:
+            if not self._pendientes:
+                return
+            pendientes, self._pendientes = self._pendientes, []
+            # La noticia puede venir de otro origen (por ejemplo NOTICIAS_FILE); se registra si no existe
+            noticias = {fila[0]: noticia for _, noticia, fila in pendientes}
+            with self._conexion:
+                nuevas = self._conexion.executemany(
+                    "INSERT OR IGNORE INTO noticias (clave, url, hash, fuente, fecha, datos) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(clave, noticia.get("url"), hash_noticia(noticia), noticia.get("fuente"), fecha_iso(noticia),
+                      json.dumps(noticia, ensure_ascii=False)) for clave, noticia in noticias.items()]
+                ).rowcount
+                if nuevas:
+                    self._conexion.execute("DELETE FROM frecuencias_triaje")
+                self._conexion.executemany(
+                    "INSERT OR REPLACE INTO evaluaciones (clave, version, modelo, evaluacion, creada) VALUES (?, ?, ?, ?, ?)",
+                    [fila for destino, _, fila in pendientes if destino == "evaluaciones"]
+                )
+                self._conexion.executemany(
+                    "INSERT OR REPLACE INTO respuestas (clave, version, modelo, respuesta, tipo, creada) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [fila for destino, _, fila in pendientes if destino == "respuestas"]
+                )
+            self._ultimo_guardado = time.monotonic()
+
+    def reemplazar_evaluaciones(self, evaluaciones, version, modelo):
+        self.guardar_pendientes()
+        ahora = time.time()
+        with self._lock, self._conexion:
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO evaluaciones (clave, version, modelo, evaluacion, creada) VALUES (?, ?, ?, ?, ?)",
+                [(clave, version, modelo, json.dumps(evaluacion, ensure_ascii=False), ahora)
+                 for clave, evaluacion in evaluaciones.items()]
+            )
+
+    def guardar_omitidas(self, revisadas, omitidas, version, modelo):
+        ahora = time.time()
+        with self._lock, self._conexion:
+            self._conexion.executemany(
+                "DELETE FROM omitidas WHERE clave = ? AND version = ? AND modelo = ?",
+                [(clave_noticia(noticia), version, modelo) for noticia in revisadas]
+            )
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO omitidas (clave, version, modelo, motivo, creada) VALUES (?, ?, ?, ?, ?)",
+                [(clave_noticia(noticia), version, modelo, motivo, ahora) for noticia, motivo in omitidas]
+            )
+
+    def cargar_omitidas(self, version, modelo):
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT clave, motivo FROM omitidas WHERE version = ? AND modelo = ?", (version, modelo)
+            ).fetchall()
+        return dict(filas)
+
+    def cargar_frecuencias(self, clave):
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT frecuencias, total FROM frecuencias_triaje WHERE clave = ?", (clave,)
+            ).fetchone()
+        if not fila:
+            return None
+        return json.loads(zlib.decompress(fila[0]).decode('utf-8')), fila[1]
+
+    def guardar_frecuencias(self, clave, frecuencias, total):
+        datos = zlib.compress(json.dumps(frecuencias, ensure_ascii=False).encode('utf-8'))
+        with self._lock, self._conexion:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO frecuencias_triaje (clave, total, frecuencias) VALUES (?, ?, ?)",
+                (clave, total, datos)
+            )
+
+    def iterar_respuestas(self, version, modelo):
+        self.guardar_pendientes()
+        lectura = sqlite3.connect(f"file:{self.ruta}?mode=ro", uri=True)
+        try:
+            filas = lectura.execute(
+                "SELECT clave, respuesta, tipo FROM respuestas WHERE version = ? AND modelo = ? ORDER BY rowid",
+                (version, modelo)
+            )
+            for clave, respuesta, tipo in filas:
+                yield clave, zlib.decompress(respuesta).decode('utf-8'), tipo
+        finally:
+            lectura.close()
+
+    def exportar_json(self, ruta, version, modelo, **filtros):
+        self.guardar_pendientes()
+        consulta, parametros = self._consulta_noticias("n.datos, e.evaluacion, o.motivo", **filtros)
+        consulta = consulta.replace(
+            "FROM noticias n",
+            "FROM noticias n LEFT JOIN evaluaciones e ON e.clave = n.clave AND e.version = ? AND e.modelo = ? "
+            "LEFT JOIN omitidas o ON o.clave = n.clave AND o.version = ? AND o.modelo = ?"
+        )
+        lectura = sqlite3.connect(f"file:{self.ruta}?mode=ro", uri=True)
+        try:
+            filas = lectura.execute(consulta, [version, modelo, version, modelo] + parametros)
+            return _escribir_lista_json(
+                (_con_evaluacion(json.loads(datos), json.loads(evaluacion) if evaluacion else None, motivo)
+                 for datos, evaluacion, motivo in filas),
+                ruta
+            )
+        finally:
+            lectura.close()
+
+    def cerrar(self):
+        self.guardar_pendientes()
+        with self._lock:
+            self._conexion.close()
+
+
+# Función para crear el almacén configurado con ALMACEN (sqlite o json)
+# Con `requiere_noticias` falla si el almacén no tiene ninguna noticia, en lugar de no evaluar nada
+def crear_almacen(tipo=None, ruta_sqlite=None, ruta_noticias=None, ruta_diario=None, ruta_respuestas=None,
+                  requiere_noticias=False):
+    tipo = tipo or ALMACEN
+    if tipo == 'sqlite':
+        ruta = ruta_sqlite or RUTA_SQLITE
+        if os.getenv('NOTICIAS_FILE'):
+            logger.warning(f"NOTICIAS_FILE se ignora con el almacén sqlite: las noticias se leen de {ruta} "
+                           f"(ALMACEN=json usa {os.getenv('NOTICIAS_FILE')})")
+        almacen = AlmacenSQLite(ruta)
+    elif tipo == 'json':
+        opciones = {"ruta_noticias": ruta_noticias, "ruta_diario": ruta_diario, "ruta_respuestas": ruta_respuestas}
+        almacen = AlmacenJSON(**{clave: valor for clave, valor in opciones.items() if valor})
+        ruta = almacen.ruta
+    else:
+        raise ValueError(f"Almacén desconocido: {tipo} (usa sqlite o json)")
+
+    if requiere_noticias:
+        noticias = almacen.iterar_noticias()
+        vacio = next(noticias, None) is None
+        noticias.close()
+        if vacio:
+            almacen.cerrar()
+            raise ValueError(f"El almacén {ruta} no tiene noticias; ejecuta cleaningJson.py primero")
+    return almacen
+
+
+# Función para guardar como `version` las evaluaciones de una exportación anterior (por ejemplo las de
+# noticias_con_evaluacion1..5.json); agrega las noticias que falten y omite las evaluaciones vacías
+def importar_evaluaciones(almacen, noticias, version, modelo):
+    existentes = {clave_noticia(noticia) for noticia in almacen.iterar_noticias()}
+    nuevas = []
+    evaluaciones = {}
+    for noticia in noticias:
+        evaluacion = noticia.get("evaluacion")
+        noticia = {campo: valor for campo, valor in noticia.items() if campo != "evaluacion"}
+        clave = clave_noticia(noticia)
+        if clave not in existentes:
+            existentes.add(clave)
+            nuevas.append(noticia)
+        if isinstance(evaluacion, dict) and any(valor and valor not in ("No evaluado", "No evaluada")
+                                                 for valor in evaluacion.values()):
+            evaluaciones[clave] = evaluacion
+    if nuevas:
+        almacen.guardar_noticias(nuevas)
+    almacen.reemplazar_evaluaciones(evaluaciones, version, modelo)
+    return len(evaluaciones)
+
+
+# Línea de comandos: importar un JSON/JSONL de noticias, consultar y exportar sin cargar todo el corpus
+def main():
+    parser = argparse.ArgumentParser(description="Consultas sobre el almacén de noticias y evaluaciones")
+    parser.add_argument('--almacen', default=None, help="sqlite o json (por defecto ALMACEN)")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    importar = subparsers.add_parser('importar', help="cargar noticias de un archivo JSON o JSONL")
+    importar.add_argument('ruta')
+    importar.add_argument('--version', default=None,
+                          help="guardar también las evaluaciones del archivo con esta versión (p. ej. 0.3)")
+    importar.add_argument('--modelo', default='llama3.2')
+    subparsers.add_parser('versiones', help="evaluaciones guardadas por versión y modelo")
+
+    for nombre in ('consultar', 'exportar'):
+        subparser = subparsers.add_parser(nombre)
+        subparser.add_argument('--fuente')
+        subparser.add_argument('--desde', help="fecha ISO inclusiva, p. ej. 2024-10-19")
+        subparser.add_argument('--hasta', help="fecha ISO exclusiva, p. ej. 2024-10-20")
+        subparser.add_argument('--version', default='0.5')
+        subparser.add_argument('--modelo', default='llama3.2')
+        if nombre == 'consultar':
+            subparser.add_argument('--sin-evaluar', action='store_true', help="solo las que no tienen esa evaluación")
+        else:
+            subparser.add_argument('ruta')
+    argumentos = parser.parse_args()
+
+    almacen = crear_almacen(argumentos.almacen)
+    try:
+        if argumentos.comando == 'importar':
+            with open(argumentos.ruta, 'r', encoding='utf-8') as file:
+                if argumentos.ruta.endswith('.jsonl'):
+                    noticias = [json.loads(linea) for linea in file if linea.strip()]
+                else:
+                    noticias = json.load(file)
+            if argumentos.version:
+                total = importar_evaluaciones(almacen, noticias, argumentos.version, argumentos.modelo)
+                print(f"{total} evaluaciones importadas con la versión {argumentos.version}")
+            else:
+                print(f"{almacen.guardar_noticias(noticias)} noticias importadas")
+            return
+
+        if argumentos.comando == 'versiones':
+            for (version, modelo), total in almacen.contar_evaluaciones().items():
+                print(f"{version}\t{modelo}\t{total}")
+            return
+
+        filtros = {"fuente": argumentos.fuente, "desde": argumentos.desde, "hasta": argumentos.hasta}
+        if argumentos.comando == 'exportar':
+            total = almacen.exportar_json(argumentos.ruta, argumentos.version, argumentos.modelo, **filtros)
+            print(f"{total} noticias exportadas a {argumentos.ruta}")
+            return
+
+        sin_evaluar = (argumentos.version, argumentos.modelo) if argumentos.sin_evaluar else None
+        total = 0
+        for noticia in almacen.iterar_noticias(sin_evaluar=sin_evaluar, **filtros):
+            print(f"{noticia.get('fecha')}\t{noticia.get('fuente')}\t{noticia.get('titulo')}")
+            total += 1
+        print(f"{total} noticias")
+    finally:
+        almacen.cerrar()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
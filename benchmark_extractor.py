@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from extractor_texto import BACKENDS, extraer_texto
+
+# Directorio del repositorio, para encontrar raw/ aunque se ejecute desde otra carpeta
+DIRECTORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+# Función de referencia: la limpieza que hacen los scripts de evaluación con BeautifulSoup
+def limpiar_html(contenido):
+    return BeautifulSoup(contenido, "html.parser").get_text()
+
+
+# Función para reunir el HTML de las noticias de raw/, opcionalmente solo de las fuentes indicadas
+def cargar_contenidos(fuentes=None, limite=None):
+    carpeta_raw = os.path.join(DIRECTORIO_REPO, 'raw')
+    contenidos = []
+    for archivo in sorted(os.listdir(carpeta_raw)):
+        if not archivo.endswith('.json'):
+            continue
+        if fuentes and not any(fuente in archivo for fuente in fuentes):
+            continue
+        with open(os.path.join(carpeta_raw, archivo), 'r', encoding='utf-8') as file:
+            try:
+                noticias = json.load(file)
+            except json.JSONDecodeError:
+                continue
+        # El mismo campo que cleaningJson.py guarda como "contenido"
+        contenidos.extend(noticia.get("content:encoded") or noticia.get("content") or "" for noticia in noticias)
+    return contenidos[:limite] if limite else contenidos
+
+
+# Función para medir el mejor tiempo de varias pasadas de una función sobre todos los contenidos
+def medir(funcion, contenidos, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for contenido in contenidos:
+            funcion(contenido)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara limpiar_html (BeautifulSoup) con los extractores de texto disponibles")
+    parser.add_argument('--fuente', action='append', help="filtrar archivos de raw/ por nombre (p. ej. La_Jornada)")
+    parser.add_argument('--limite', type=int, default=None, help="número máximo de noticias")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    argumentos = parser.parse_args()
+
+    contenidos = cargar_contenidos(argumentos.fuente, argumentos.limite)
+    megabytes = sum(len(contenido.encode('utf-8')) for contenido in contenidos) / (1024 * 1024)
+
+    candidatos = {"beautifulsoup": limpiar_html}
+    for nombre in BACKENDS:
+        candidatos[nombre] = lambda contenido, nombre=nombre: extraer_texto(contenido, backend=nombre)
+
+    referencia = None
+    resultados = {}
+    for nombre, funcion in candidatos.items():
+        duracion = medir(funcion, contenidos, argumentos.repeticiones)
+        referencia = referencia or duracion
+        resultados[nombre] = {
+            "segundos": round(duracion, 4),
+            "ms_por_noticia": round(duracion * 1000 / max(len(contenidos), 1), 4),
+            "mb_por_segundo": round(megabytes / duracion, 2) if duracion > 0 else None,
+            "aceleracion": round(referencia / duracion, 2) if duracion > 0 else None
+        }
+
+    print(json.dumps({"noticias": len(contenidos), "html_mb": round(megabytes, 2), "resultados": resultados},
+                     ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
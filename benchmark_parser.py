@@ -0,0 +1,158 @@
+import argparse
+import json
+import re
+import sys
+import time
+
+from parser_secciones import procesar_respuesta_secciones
+from servidor_ollama_falso import ENCABEZADOS_RESPUESTA, cargar_evaluaciones_grabadas
+
+
+# Parser de referencia: el de evaluacion0.5.py antes del parser de una pasada (sin la tokenización con NLTK,
+# cuyo resultado no se usaba), para comparar tiempos y campos extraídos.
+def procesar_respuesta_anterior(nlp_response):
+    evaluacion = {
+        "preguntas": [],
+        "hechos o evidencias": [],
+        "conclusiones": [],
+        "suposiciones implícitas": [],
+        "palabras clave importantes": [],
+        "palabras clave deducidas": [],
+        "sujetos importantes": [],
+        "lugares físicos": [],
+        "medios de información o sitios web": [],
+        "resumen": ""
+    }
+    encabezados = [
+        "Preguntas que se plantean en el texto",
+        "Hechos o evidencias que sustentan el texto",
+        "Conclusiones escritas en la noticia",
+        "Suposiciones implícitas",
+        "Palabras clave importantes",
+        "Palabras clave deducidas",
+        "Sujetos importantes mencionados",
+        "Lugares físicos mencionados",
+        "Medios de información o sitios web mencionados",
+        "Resumen",
+        "Análisis de la Noticia"
+    ]
+    for encabezado in encabezados:
+        key = encabezado.lower().replace(" mencionados", "").replace("que se plantean en el texto", "")
+        if key in evaluacion:
+            if isinstance(evaluacion[key], list):
+                evaluacion[key] = extraer_lista_seccion_anterior(nlp_response, encabezado)
+            else:
+                evaluacion[key] = extraer_seccion_anterior(nlp_response, encabezado)
+    if not evaluacion["resumen"]:
+        evaluacion["resumen"] = extraer_seccion_anterior(nlp_response, "Conclusión") or extraer_seccion_anterior(nlp_response, "Análisis de la Noticia")
+    return evaluacion
+
+
+def extraer_seccion_anterior(texto, encabezado):
+    patrones = [
+        rf"\*\*{re.escape(encabezado)}:?\*\*:?\s*(.*?)(?=\n\*\*|\Z)",
+        rf"{re.escape(encabezado)}:?\s*(.*?)(?=\n\w+:|\Z)",
+        rf"\d+\.\s*{re.escape(encabezado)}:?\s*(.*?)(?=\n\d+\.|\Z)"
+    ]
+    for patron in patrones:
+        resultado = re.search(patron, texto, re.DOTALL | re.IGNORECASE)
+        if resultado:
+            return resultado.group(1).strip()
+    return "No evaluado"
+
+
+def extraer_lista_seccion_anterior(texto, encabezado):
+    seccion = extraer_seccion_anterior(texto, encabezado)
+    if seccion != "No evaluado":
+        items = re.findall(r'(?:^|\n)\s*(?:\*|-|\d+\.|[a-z]\)|\(?\d+\)?)\s*(.*?)(?=\n|$)', seccion)
+        if not items:
+            items = [line.strip() for line in seccion.split('\n') if line.strip()]
+        return [item for item in items if item]
+    return []
+
+
+# Función para limpiar una evaluación grabada: las antiguas a veces traen encabezados como elementos
+def evaluacion_esperada(evaluacion):
+    esperada = {}
+    for clave in ENCABEZADOS_RESPUESTA:
+        valor = evaluacion.get(clave)
+        if isinstance(valor, list):
+            esperada[clave] = [elemento for elemento in valor if elemento and not elemento.startswith('**')]
+        else:
+            esperada[clave] = valor if valor and valor != "No evaluado" else "No evaluado"
+    return esperada
+
+
+# Función para escribir una evaluación como respuesta de texto en los formatos que usa el modelo
+def renderizar(evaluacion, formato):
+    partes = []
+    for numero, (clave, encabezado) in enumerate(ENCABEZADOS_RESPUESTA.items(), start=1):
+        valor = evaluacion[clave]
+        if isinstance(valor, list):
+            if not valor:
+                continue
+            cuerpo = "\n".join(f"* {elemento}" for elemento in valor)
+        elif valor != "No evaluado":
+            cuerpo = valor
+        else:
+            continue
+        if formato == "negrita":
+            partes.append(f"**{encabezado}:**\n{cuerpo}")
+        elif formato == "numerado":
+            partes.append(f"{numero}. {encabezado}:\n{cuerpo}")
+        elif formato == "dos_puntos":
+            partes.append(f"{encabezado}:\n{cuerpo}")
+        else:
+            partes.append(f"* **{encabezado}**:\n{cuerpo}")
+    return "\n\n".join(partes)
+
+
+FORMATOS = ["negrita", "numerado", "dos_puntos", "vineta_negrita"]
+
+
+# Función para contar los campos que el parser recupera igual que en la evaluación original
+def campos_correctos(parser, respuestas):
+    correctos = 0
+    for respuesta, esperada in respuestas:
+        obtenida = parser(respuesta)
+        correctos += sum(obtenida.get(clave) == valor for clave, valor in esperada.items())
+    return correctos
+
+
+def medir(parser, respuestas, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for respuesta, _ in respuestas:
+            parser(respuesta)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara el parser de secciones de una pasada con el anterior sobre las respuestas grabadas")
+    parser.add_argument('--repeticiones', type=int, default=20)
+    argumentos = parser.parse_args()
+
+    evaluaciones = [evaluacion_esperada(evaluacion) for evaluacion in cargar_evaluaciones_grabadas()]
+    evaluaciones = [evaluacion for evaluacion in evaluaciones
+                    if any(valor and valor != "No evaluado" for valor in evaluacion.values())]
+
+    resultados = {}
+    for formato in FORMATOS:
+        respuestas = [(renderizar(evaluacion, formato), evaluacion) for evaluacion in evaluaciones]
+        total_campos = len(respuestas) * len(ENCABEZADOS_RESPUESTA)
+        resultados[formato] = {}
+        for nombre, funcion in (("anterior", procesar_respuesta_anterior), ("una_pasada", procesar_respuesta_secciones)):
+            duracion = medir(funcion, respuestas, argumentos.repeticiones)
+            resultados[formato][nombre] = {
+                "ms_por_respuesta": round(duracion * 1000 / max(len(respuestas), 1), 4),
+                "campos_correctos": f"{campos_correctos(funcion, respuestas)}/{total_campos}"
+            }
+
+    print(json.dumps({"respuestas": len(evaluaciones), "resultados": resultados}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from almacen import ALMACEN, crear_almacen
+from cleaningJson import iterar_noticias_normalizadas
+from deduplicacion import IndiceDeduplicacion
+from servidor_ollama_falso import ServidorOllamaFalso
+
+# Directorio del repositorio, para encontrar raw/ y los scripts aunque se ejecute desde otra carpeta
+DIRECTORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+# Función que corre el servidor falso en un proceso aparte, para no medir su CPU ni su memoria
+def _servir(configuracion, cola):
+    servidor = ServidorOllamaFalso(**configuracion)
+    cola.put(servidor.url)
+    servidor.servir()
+
+
+def iniciar_servidor(configuracion):
+    cola = multiprocessing.Queue()
+    proceso = multiprocessing.Process(target=_servir, args=(configuracion, cola), daemon=True)
+    proceso.start()
+    return proceso, cola.get(timeout=30)
+
+
+# Función para normalizar el corpus de raw/ igual que cleaningJson.py y guardarlo en el almacén configurado
+def preparar_corpus(limite=None, deduplicar=True):
+    carpeta_raw = os.path.join(DIRECTORIO_REPO, 'raw')
+    rutas = [os.path.join(carpeta_raw, archivo) for archivo in sorted(os.listdir(carpeta_raw)) if archivo.endswith('.json')]
+    indice = IndiceDeduplicacion('./clean/indice_dedup.json')
+    noticias = []
+    for noticia in iterar_noticias_normalizadas(rutas):
+        if deduplicar and indice.es_duplicada(noticia):
+            continue
+        noticias.append(noticia)
+        if limite and len(noticias) >= limite:
+            break
+    almacen = crear_almacen(ruta_noticias='./clean/noticias_benchmark.jsonl')
+    try:
+        return almacen.guardar_noticias(noticias, reemplazar=True)
+    finally:
+        almacen.cerrar()
+
+
+# Función para cargar evaluacion0.5.py como módulo (su nombre lleva un punto y no se puede importar directo)
+def cargar_evaluacion(ruta=os.path.join(DIRECTORIO_REPO, 'evaluacion0.5.py')):
+    spec = importlib.util.spec_from_file_location('evaluacion_benchmark', ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def ejecutar(argumentos):
+    configuracion = {
+        "tokens_por_segundo": argumentos.tokens_por_segundo,
+        "latencia": argumentos.latencia,
+        "tokens_prompt_por_segundo": argumentos.tokens_prompt_por_segundo,
+        "tasa_errores": argumentos.tasa_errores,
+        "semilla": argumentos.semilla,
+        "paralelo": argumentos.paralelo,
+        "cola_maxima": argumentos.cola_maxima
+    }
+    # Varios servidores simulan varios nodos de inferencia; API_URL los lista separados por comas
+    servidores = [iniciar_servidor(configuracion) for _ in range(argumentos.servidores)]
+    url = ",".join(url_servidor for _, url_servidor in servidores)
+
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='benchmark_') as directorio:
+        try:
+            # evaluacion0.5.py usa rutas relativas (./clean, ./cache, ./metricas): se ejecuta dentro del temporal
+            os.chdir(directorio)
+            os.makedirs('clean')
+
+            inicio = time.perf_counter()
+            total = preparar_corpus(argumentos.limite, not argumentos.con_duplicados)
+            duracion_normalizacion = time.perf_counter() - inicio
+
+            os.environ.update({
+                "API_URL": url,
+                "METRICAS_FILE": './metricas/llamadas_ollama.jsonl',
+                "MAX_CONCURRENCIA": str(argumentos.concurrencia),
+                "CONCURRENCIA_ADAPTATIVA": '0' if argumentos.concurrencia_fija else '1',
+                "PROCESOS_ETAPAS": str(argumentos.procesos_etapas),
+                "CACHE_DESACTIVADO": '0' if argumentos.con_cache else '1',
+                "OLLAMA_BACKOFF": '0.1'
+            })
+            # El archivo de noticias solo se lee con ALMACEN=json; con SQLite están en clean/noticias.db
+            if ALMACEN == 'json':
+                os.environ["NOTICIAS_FILE"] = './clean/noticias_benchmark.jsonl'
+            modulo = cargar_evaluacion()
+
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            etapas = modulo.procesar_noticias(argumentos.concurrencia)
+            # Las noticias omitidas por el triaje no cuentan para el rendimiento
+            evaluadas = sum(estadisticas["evaluadas"] for estadisticas in etapas.values())
+            duracion = time.perf_counter() - inicio
+            _, pico_memoria = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            control = modulo.control.resumen()
+
+            with open('./metricas/llamadas_ollama_resumen.json', 'r', encoding='utf-8') as file:
+                resumen_llamadas = json.load(file)
+        finally:
+            os.chdir(directorio_original)
+            for proceso, _ in servidores:
+                proceso.terminate()
+
+    return {
+        "timestamp": time.time(),
+        "configuracion": dict(configuracion, concurrencia=argumentos.concurrencia, con_cache=argumentos.con_cache,
+                              concurrencia_fija=argumentos.concurrencia_fija, servidores=argumentos.servidores,
+                              procesos_etapas=argumentos.procesos_etapas),
+        "noticias": total,
+        "normalizacion_s": round(duracion_normalizacion, 3),
+        "evaluacion_s": round(duracion, 3),
+        "evaluadas": evaluadas,
+        "noticias_por_segundo": round(evaluadas / duracion, 3) if duracion > 0 else None,
+        "pico_memoria_python_mb": round(pico_memoria / (1024 * 1024), 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+        # Tiempo de los parsers en el motor por etapas (preparación e interpretación van en otros procesos)
+        "interpretacion_s": round(sum(estadisticas.get("interpretacion_s", 0.0) for estadisticas in etapas.values()), 4),
+        "etapas": etapas,
+        "llamadas_modelo": resumen_llamadas,
+        "control_concurrencia": control
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reproducible del pipeline contra un servidor Ollama falso")
+    parser.add_argument('--concurrencia', type=int, default=4,
+                        help="solicitudes simultáneas; con control adaptativo es el máximo")
+    parser.add_argument('--concurrencia-fija', action='store_true', help="desactivar el control adaptativo de concurrencia")
+    parser.add_argument('--tokens-por-segundo', type=float, default=200.0)
+    parser.add_argument('--latencia', type=float, default=0.05, help="segundos antes del primer token")
+    parser.add_argument('--tokens-prompt-por-segundo', type=float, default=2000.0,
+                        help="ritmo de evaluación del prompt fuera del prefijo en caché")
+    parser.add_argument('--tasa-errores', type=float, default=0.0, help="fracción de solicitudes que responden 503")
+    parser.add_argument('--paralelo', type=int, default=None,
+                        help="solicitudes que el servidor atiende a la vez (OLLAMA_NUM_PARALLEL); el resto espera en cola")
+    parser.add_argument('--cola-maxima', type=int, default=None,
+                        help="solicitudes en cola antes de responder 503 (OLLAMA_MAX_QUEUE)")
+    parser.add_argument('--procesos-etapas', type=int, default=2,
+                        help="procesos para preparar prompts e interpretar respuestas (0: en los hilos de inferencia)")
+    parser.add_argument('--servidores', type=int, default=1, help="número de servidores falsos entre los que se reparte la carga")
+    parser.add_argument('--limite', type=int, default=None, help="número máximo de noticias a evaluar")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--con-cache', action='store_true', help="usar la caché de respuestas (por defecto se desactiva)")
+    parser.add_argument('--con-duplicados', action='store_true', help="no deduplicar el corpus antes de evaluar")
+    parser.add_argument('--salida', default=None, help="archivo JSONL donde añadir el resultado para comparar ejecuciones")
+    argumentos = parser.parse_args()
+
+    resultado = ejecutar(argumentos)
+    print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    if argumentos.salida:
+        with open(argumentos.salida, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Al superar el límite se desaloja hasta esta fracción de max_bytes, para que las siguientes escrituras no
+# vuelvan a recorrer el directorio cada vez
+FRACCION_DESALOJO = 0.9
+
+# Campos del payload que no cambian la respuesta generada y por lo tanto no forman parte de la clave
+CAMPOS_IGNORADOS = {"stream", "keep_alive"}
+
+
+# Caché en disco de respuestas completas del modelo, direccionada por contenido.
+# Cada entrada es un archivo <sha256>.json; al superar max_bytes se eliminan las menos usadas hasta
+# quedar en FRACCION_DESALOJO del límite.
+class CacheRespuestas:
+    def __init__(self, directorio='./cache/respuestas', max_bytes=200 * 1024 * 1024, activo=True):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.activo = activo
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._tamano_total = 0
+
+        if self.activo:
+            os.makedirs(self.directorio, exist_ok=True)
+            self._tamano_total = sum(tamano for _, _, tamano in self._entradas())
+
+    # Función para calcular la clave a partir del modelo, el prompt y las opciones de generación
+    @staticmethod
+    def clave(payload):
+        datos = {k: v for k, v in payload.items() if k not in CAMPOS_IGNORADOS}
+        serializado = json.dumps(datos, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    # Función para listar las entradas como (ruta, último uso, tamaño)
+    def _entradas(self):
+        entradas = []
+        for archivo in os.listdir(self.directorio):
+            if archivo.endswith('.json'):
+                ruta = os.path.join(self.directorio, archivo)
+                try:
+                    info = os.stat(ruta)
+                except FileNotFoundError:
+                    continue
+                entradas.append((ruta, info.st_mtime, info.st_size))
+        return entradas
+
+    # Función para obtener una respuesta guardada; devuelve None si no existe
+    def obtener(self, payload):
+        if not self.activo:
+            return None
+
+        ruta = self._ruta(self.clave(payload))
+        try:
+            with open(ruta, 'r', encoding='utf-8') as file:
+                respuesta = json.load(file)["respuesta"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            with self._lock:
+                self.fallos += 1
+            return None
+
+        # Una respuesta vacía no sirve como acierto: se borra para que la próxima vez se consulte al modelo
+        if not isinstance(respuesta, str) or not respuesta.strip():
+            self._eliminar(ruta)
+            with self._lock:
+                self.fallos += 1
+            return None
+
+        # Actualizar la fecha de modificación para que cuente como uso reciente
+        try:
+            os.utime(ruta)
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            self.aciertos += 1
+        return respuesta
+
+    def _eliminar(self, ruta):
+        try:
+            tamano = os.path.getsize(ruta)
+            os.remove(ruta)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._tamano_total -= tamano
+
+    # Función para guardar una respuesta completa y aplicar el límite de tamaño; las vacías no se guardan
+    def guardar(self, payload, respuesta):
+        if not self.activo or not respuesta or not respuesta.strip():
+            return
+
+        ruta = self._ruta(self.clave(payload))
+        contenido = json.dumps({"modelo": payload.get("model"), "respuesta": respuesta}, ensure_ascii=False)
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as file:
+            file.write(contenido)
+        tamano_anterior = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+        os.replace(temporal, ruta)
+
+        with self._lock:
+            self._tamano_total += os.path.getsize(ruta) - tamano_anterior
+            if self._tamano_total > self.max_bytes:
+                self._desalojar()
+
+    # Función para eliminar las entradas menos usadas hasta quedar en FRACCION_DESALOJO del límite
+    def _desalojar(self):
+        entradas = sorted(self._entradas(), key=lambda entrada: entrada[1])
+        self._tamano_total = sum(tamano for _, _, tamano in entradas)
+        objetivo = self.max_bytes * FRACCION_DESALOJO
+        for ruta, _, tamano in entradas:
+            if self._tamano_total <= objetivo:
+                break
+            try:
+                os.remove(ruta)
+                self._tamano_total -= tamano
+            except FileNotFoundError:
+                pass
+
+    def estadisticas(self):
+        total = self.aciertos + self.fallos
+        return {
+            "activo": self.activo,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / total, 3) if total else 0.0,
+            "tamano_bytes": self._tamano_total,
+        }
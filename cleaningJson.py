@@ -1,14 +1,53 @@
 import os
 import json
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from deduplicacion import IndiceDeduplicacion
+from extractor_texto import extraer_texto
+from almacen import crear_almacen
 
 # Directorios de entrada y salida
 carpeta_raw = './raw'
 carpeta_clean = './clean'
 
-# Crear la carpeta de salida si no existe
-if not os.path.exists(carpeta_clean):
-    os.makedirs(carpeta_clean)
+# Archivo de salida con ALMACEN=json: una noticia normalizada por línea (JSONL);
+# con el almacén SQLite (por defecto) las noticias se guardan en clean/noticias.db
+archivo_salida = 'noticias_combinadas.jsonl'
+
+# Noticias normalizadas de cada archivo raw y manifiesto con lo que ya se procesó
+carpeta_fragmentos = os.path.join(carpeta_clean, 'normalizadas')
+ruta_manifiesto = os.path.join(carpeta_clean, 'manifiesto_raw.json')
+
+# Índice de noticias ya combinadas, para que cada historia llegue una sola vez al modelo
+ruta_indice_dedup = os.path.join(carpeta_clean, 'indice_dedup.json')
+
+# Cambia cuando normalizar_noticia produce otros campos; obliga a regenerar los fragmentos
+VERSION_NORMALIZACION = 4
+
+# Valor que algunos feeds ponen en fullContent cuando no pudieron descargar el artículo
+SIN_TEXTO_COMPLETO = "NO TEXT FOUND"
+
+# Función para elegir el cuerpo de la noticia: el HTML del feed y, si no hay, el texto completo descargado
+# (fullContent, donde La Jornada y Strategic Culture traen el artículo) o la descripción (Milenio, El Economista)
+def elegir_contenido(noticia_original):
+    contenido = noticia_original.get("content:encoded") or noticia_original.get("content")
+    if contenido and contenido.strip():
+        return contenido
+    texto_completo = noticia_original.get("fullContent")
+    if texto_completo and texto_completo.strip() and texto_completo.strip() != SIN_TEXTO_COMPLETO:
+        return texto_completo
+    descripcion = noticia_original.get("description")
+    if descripcion and descripcion.strip():
+        return descripcion
+    return "Contenido no disponible"
+
+# Función para obtener el texto plano del cuerpo; fullContent y description ya son texto, un párrafo por línea
+def texto_contenido(contenido):
+    if '<' in contenido:
+        return extraer_texto(contenido)
+    return "\n".join(linea.strip() for linea in contenido.split("\n") if linea.strip())
 
 # Función para normalizar una noticia
 def normalizar_noticia(noticia_original):
@@ -20,44 +59,183 @@ def normalizar_noticia(noticia_original):
     except ValueError:
         fecha = "Fecha no disponible"
 
-    # Normalizar los campos
+    contenido = elegir_contenido(noticia_original)
+
+    # Normalizar los campos; el texto plano se extrae aquí una sola vez para no parsear el HTML en cada evaluación
     return {
         "titulo": noticia_original.get("title", "Título no disponible"),
-        "contenido": noticia_original.get("content:encoded") or noticia_original.get("content", "Contenido no disponible"),
+        "contenido": contenido,
+        "texto": texto_contenido(contenido),
         "fuente": noticia_original.get("newsMedia", "Fuente no disponible"),
         "fecha": fecha,
         "pais": "País no disponible",  # Si no tienes esta información, la dejamos como predeterminada
         "tema": noticia_original.get("section") or ', '.join(noticia_original.get("categories", ["Tema no disponible"])),
         "url": noticia_original.get("link", "URL no disponible"),
+        "guid": noticia_original.get("guid") or noticia_original.get("id") or "ID no disponible",
         "autor": noticia_original.get("creator") or noticia_original.get("author") or "Autor no disponible"
     }
 
-# Procesar todos los archivos JSON en la carpeta 'raw' y combinarlos en uno solo
-def procesar_y_combinar_archivos():
-    todas_las_noticias = []  # Lista para almacenar todas las noticias
-
-    for archivo in os.listdir(carpeta_raw):
-        if archivo.endswith('.json'):
-            ruta_archivo = os.path.join(carpeta_raw, archivo)
-
-            # Leer el archivo JSON
-            with open(ruta_archivo, 'r', encoding='utf-8') as file:
-                try:
-                    noticias = json.load(file)
-                except json.JSONDecodeError:
-                    print(f"Error al procesar {archivo}. No es un JSON válido.")
-                    continue
-
-            # Normalizar todas las noticias del archivo y agregarlas a la lista general
-            noticias_normalizadas = [normalizar_noticia(noticia) for noticia in noticias]
-            todas_las_noticias.extend(noticias_normalizadas)
-
-    # Guardar todas las noticias combinadas en un único archivo JSON en la carpeta 'clean'
-    ruta_salida = os.path.join(carpeta_clean, 'noticias_combinadas.json')
-    with open(ruta_salida, 'w', encoding='utf-8') as output_file:
-        json.dump(todas_las_noticias, output_file, ensure_ascii=False, indent=2)
-    
-    print(f'Archivo combinado guardado en: {ruta_salida}')
+# Función para leer y normalizar un archivo de noticias; se ejecuta en un proceso aparte
+def normalizar_archivo(ruta_archivo):
+    with open(ruta_archivo, 'r', encoding='utf-8') as file:
+        try:
+            noticias = json.load(file)
+        except json.JSONDecodeError:
+            print(f"Error al procesar {os.path.basename(ruta_archivo)}. No es un JSON válido.")
+            return []
+
+    return [normalizar_noticia(noticia) for noticia in noticias]
+
+# Generador que produce las noticias normalizadas de varios archivos, parseados en paralelo.
+# Solo hay `ventana` archivos en vuelo a la vez, así que la memoria no crece con el número de archivos.
+def iterar_noticias_normalizadas(rutas_archivos, procesos=None, ventana=None):
+    procesos = procesos or os.cpu_count() or 1
+    ventana = ventana or procesos * 2
+    rutas = iter(rutas_archivos)
+
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        en_vuelo = deque()
+        for ruta in rutas:
+            en_vuelo.append(executor.submit(normalizar_archivo, ruta))
+            if len(en_vuelo) >= ventana:
+                break
+
+        while en_vuelo:
+            noticias = en_vuelo.popleft().result()
+            # Mantener la ventana llena antes de entregar las noticias de este archivo
+            siguiente = next(rutas, None)
+            if siguiente is not None:
+                en_vuelo.append(executor.submit(normalizar_archivo, siguiente))
+            yield from noticias
+
+# Función para listar los archivos JSON de la carpeta 'raw' en orden estable
+def listar_archivos_raw():
+    return [
+        os.path.join(carpeta_raw, archivo)
+        for archivo in sorted(os.listdir(carpeta_raw))
+        if archivo.endswith('.json')
+    ]
+
+# Función para calcular el hash del contenido de un archivo sin cargarlo completo
+def hash_archivo(ruta_archivo):
+    sha256 = hashlib.sha256()
+    with open(ruta_archivo, 'rb') as file:
+        for bloque in iter(lambda: file.read(1024 * 1024), b''):
+            sha256.update(bloque)
+    return sha256.hexdigest()
+
+# Función para obtener la ruta del fragmento normalizado de un archivo raw
+def ruta_fragmento(ruta_archivo):
+    nombre = os.path.splitext(os.path.basename(ruta_archivo))[0]
+    return os.path.join(carpeta_fragmentos, f"{nombre}.jsonl")
+
+# Función para normalizar un archivo raw y guardarlo en su fragmento; se ejecuta en un proceso aparte
+def normalizar_a_fragmento(ruta_archivo):
+    noticias = normalizar_archivo(ruta_archivo)
+    with open(ruta_fragmento(ruta_archivo), 'w', encoding='utf-8') as output_file:
+        for noticia in noticias:
+            output_file.write(json.dumps(noticia, ensure_ascii=False) + "\n")
+    return len(noticias)
+
+# Funciones para leer y guardar el manifiesto {ruta: {tamano, mtime, sha256, registros}}
+def leer_manifiesto():
+    if not os.path.exists(ruta_manifiesto):
+        return {}
+    with open(ruta_manifiesto, 'r', encoding='utf-8') as file:
+        try:
+            return json.load(file)
+        except json.JSONDecodeError:
+            print("Manifiesto inválido, se reprocesarán todos los archivos.")
+            return {}
+
+def guardar_manifiesto(manifiesto):
+    temporal = ruta_manifiesto + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as file:
+        json.dump(manifiesto, file, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta_manifiesto)
+
+# Función para decidir si un archivo raw cambió desde la última ejecución.
+# Primero compara tamaño y fecha de modificación; solo si difieren calcula el hash.
+def archivo_cambio(ruta_archivo, entrada):
+    if entrada is None or entrada.get("version") != VERSION_NORMALIZACION:
+        return True
+    if not os.path.exists(ruta_fragmento(ruta_archivo)):
+        return True
+    info = os.stat(ruta_archivo)
+    if info.st_size == entrada["tamano"] and info.st_mtime == entrada["mtime"]:
+        return False
+    if info.st_size == entrada["tamano"] and hash_archivo(ruta_archivo) == entrada["sha256"]:
+        # Mismo contenido con otra fecha (por ejemplo, copiado de nuevo): solo se actualiza la fecha
+        entrada["mtime"] = info.st_mtime
+        return False
+    return True
+
+# Función para pasar los fragmentos al almacén descartando las noticias duplicadas; cada fragmento
+# se guarda de una vez. Con `reemplazar` el primero sustituye a lo que había en el almacén.
+def escribir_fragmentos(rutas_archivos, almacen, reemplazar, indice):
+    escritas = 0
+    for numero, ruta_archivo in enumerate(rutas_archivos):
+        with open(ruta_fragmento(ruta_archivo), 'r', encoding='utf-8') as fragmento:
+            noticias = [noticia for noticia in map(json.loads, fragmento) if not indice.es_duplicada(noticia)]
+        escritas += almacen.guardar_noticias(noticias, reemplazar=reemplazar and numero == 0)
+    if reemplazar and not rutas_archivos:
+        almacen.guardar_noticias([], reemplazar=True)
+    return escritas
+
+# Procesar los archivos JSON nuevos o modificados de la carpeta 'raw' y combinarlos con los ya procesados
+def procesar_y_combinar_archivos(procesos=None, forzar=False):
+    # Crear las carpetas de salida si no existen
+    os.makedirs(carpeta_fragmentos, exist_ok=True)
+
+    manifiesto = {} if forzar else leer_manifiesto()
+    rutas = listar_archivos_raw()
+    cambiados = [ruta for ruta in rutas if archivo_cambio(ruta, manifiesto.get(ruta))]
+    eliminados = [ruta for ruta in manifiesto if ruta not in rutas]
+
+    # Normalizar en paralelo solo los archivos que cambiaron
+    if cambiados:
+        with ProcessPoolExecutor(max_workers=procesos or os.cpu_count() or 1) as executor:
+            for ruta, registros in zip(cambiados, executor.map(normalizar_a_fragmento, cambiados)):
+                info = os.stat(ruta)
+                nuevo = ruta not in manifiesto
+                manifiesto[ruta] = {
+                    "tamano": info.st_size,
+                    "mtime": info.st_mtime,
+                    "sha256": hash_archivo(ruta),
+                    "registros": registros,
+                    "version": VERSION_NORMALIZACION,
+                    "nuevo": nuevo
+                }
+
+    for ruta in eliminados:
+        del manifiesto[ruta]
+        if os.path.exists(ruta_fragmento(ruta)):
+            os.remove(ruta_fragmento(ruta))
+
+    # Si solo hay archivos nuevos basta con añadirlos al final, comparándolos contra el índice guardado;
+    # si algo cambió o se eliminó, o se fuerza el reproceso, se reconstruye todo con un índice vacío
+    almacen = crear_almacen(ruta_noticias=os.path.join(carpeta_clean, archivo_salida))
+    nuevos = [ruta for ruta in cambiados if manifiesto[ruta].pop("nuevo")]
+    existe_salida = os.path.exists(ruta_indice_dedup) and almacen.contar_noticias() > 0
+    escritas = 0
+    indice = IndiceDeduplicacion(ruta_indice_dedup)
+    try:
+        if not forzar and existe_salida and not eliminados and len(nuevos) == len(cambiados):
+            if nuevos:
+                escritas = escribir_fragmentos(nuevos, almacen, False, indice.cargar())
+                indice.guardar()
+        elif forzar or cambiados or eliminados or not existe_salida:
+            escritas = escribir_fragmentos(rutas, almacen, True, indice)
+            indice.guardar()
+    finally:
+        almacen.cerrar()
+
+    guardar_manifiesto(manifiesto)
+
+    print(f'{len(cambiados)} archivos nuevos o modificados, {len(rutas) - len(cambiados)} sin cambios, {len(eliminados)} eliminados')
+    print(f'{escritas} noticias únicas escritas, {indice.duplicados} duplicadas descartadas')
+    print(f'Noticias guardadas en: {almacen.ruta}')
 
 # Ejecutar el proceso
-procesar_y_combinar_archivos()
+if __name__ == "__main__":
+    procesar_y_combinar_archivos()
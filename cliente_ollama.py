@@ -0,0 +1,295 @@
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Códigos de respuesta que vale la pena reintentar: errores del servidor o sobrecarga
+ESTADOS_REINTENTABLES = (500, 502, 503, 504)
+
+# Estadísticas que Ollama envía en el último fragmento del stream (duraciones en nanosegundos);
+# "done" indica que la respuesta llegó completa
+CAMPOS_ESTADISTICAS = (
+    "done", "total_duration", "load_duration",
+    "prompt_eval_count", "prompt_eval_duration",
+    "eval_count", "eval_duration"
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Error de configuración del cliente (por ejemplo, sin API_URL). Se lanza una sola vez al crear el cliente,
+# antes de enviar nada; no hereda de RequestException para que no se confunda con el fallo de una noticia.
+class ConfiguracionOllamaError(ValueError):
+    pass
+
+
+# Respuesta de Ollama que no sirve aunque el estado HTTP sea 200: un fragmento {"error": ...} en el stream
+# o un stream que termina sin el fragmento con done: true. Hereda de RequestException para que cuente como
+# una solicitud fallida igual que un error de red.
+class RespuestaOllamaError(requests.RequestException):
+    pass
+
+
+# Servidor de Ollama dentro de un grupo: su peso relativo, las solicitudes en vuelo y si está sano
+class NodoOllama:
+    def __init__(self, url, peso=1.0):
+        self.url = url
+        partes = urlsplit(url)
+        self.host = partes.netloc
+        self.url_salud = f"{partes.scheme}://{partes.netloc}/api/tags"
+        self.peso = peso
+        self.en_vuelo = 0
+        self.sano = True
+        self.solicitudes = 0
+        self.errores = 0
+
+    # Carga relativa al peso: un nodo con peso 2 recibe el doble de solicitudes simultáneas
+    def carga(self):
+        return (self.en_vuelo + 1) / self.peso
+
+
+# Grupo de servidores de Ollama. Cada solicitud va al nodo sano con menos solicitudes en vuelo según su
+# peso; un nodo que falla (error de conexión, timeout o 5xx) deja de recibir solicitudes hasta que
+# GET /api/tags vuelve a responder 200, lo que se comprueba en un hilo cada `intervalo_salud` segundos.
+class GrupoNodos:
+    def __init__(self, nodos, intervalo_salud=10.0, timeout_salud=5.0):
+        self.nodos = nodos
+        self.intervalo_salud = intervalo_salud
+        self.timeout_salud = timeout_salud
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        if len(nodos) > 1 and intervalo_salud:
+            self._hilo = threading.Thread(target=self._vigilar, daemon=True)
+            self._hilo.start()
+
+    # Función para elegir un nodo y contarlo en vuelo; `excluidos` son los que ya fallaron en esta solicitud.
+    # Si no queda ninguno sano se prueba el menos cargado de los demás antes que no intentarlo.
+    def elegir(self, excluidos=()):
+        with self._lock:
+            candidatos = [nodo for nodo in self.nodos if nodo not in excluidos] or self.nodos
+            sanos = [nodo for nodo in candidatos if nodo.sano] or candidatos
+            nodo = min(sanos, key=NodoOllama.carga)
+            nodo.en_vuelo += 1
+            nodo.solicitudes += 1
+            return nodo
+
+    def liberar(self, nodo, exito=True):
+        with self._lock:
+            nodo.en_vuelo -= 1
+            if exito:
+                return
+            nodo.errores += 1
+            if nodo.sano and len(self.nodos) > 1:
+                nodo.sano = False
+                logger.warning(f"Nodo {nodo.host} marcado como no disponible")
+
+    def comprobar(self, nodo):
+        try:
+            sano = requests.get(nodo.url_salud, timeout=self.timeout_salud).status_code == 200
+        except requests.RequestException:
+            sano = False
+        with self._lock:
+            if sano != nodo.sano:
+                logger.info(f"Nodo {nodo.host} {'disponible de nuevo' if sano else 'no responde a /api/tags'}")
+            nodo.sano = sano
+        return sano
+
+    def _vigilar(self):
+        while not self._detener.wait(self.intervalo_salud):
+            for nodo in self.nodos:
+                self.comprobar(nodo)
+
+    def detener(self):
+        self._detener.set()
+
+    def resumen(self):
+        with self._lock:
+            return {
+                nodo.host: {"peso": nodo.peso, "solicitudes": nodo.solicitudes, "errores": nodo.errores, "sano": nodo.sano}
+                for nodo in self.nodos
+            }
+
+
+# Función para leer la lista de servidores: URLs separadas por comas, cada una con un peso opcional
+# después de "|", por ejemplo "http://gpu1:11434/api/generate|2,http://gpu2:11434/api/generate"
+def leer_nodos(urls):
+    nodos = []
+    for entrada in (urls or "").split(','):
+        entrada = entrada.strip()
+        if not entrada:
+            continue
+        url, _, peso = entrada.partition('|')
+        nodos.append(NodoOllama(url.strip(), float(peso) if peso.strip() else 1.0))
+    return nodos
+
+
+# Cliente reutilizable para la API de Ollama.
+# Mantiene una sesión con pool de conexiones y keep-alive, de modo que miles de solicitudes seguidas
+# reutilizan las mismas conexiones TCP/TLS en lugar de abrir una nueva por noticia.
+# `url` puede ser una lista de servidores (ver leer_nodos); con varios, el cliente reparte las solicitudes
+# y, si un servidor falla, reintenta en otro en lugar de esperar al mismo.
+class ClienteOllama:
+    def __init__(self, url=None, tamano_pool=10, timeout_conexion=10, timeout_lectura=300,
+                 reintentos=3, backoff=1.0, timeout_total=None, intervalo_salud=10.0):
+        nodos = leer_nodos(url or os.getenv('API_URL'))
+        if not nodos:
+            raise ConfiguracionOllamaError("No hay servidores de Ollama configurados: define API_URL en el archivo .env")
+        self.grupo = GrupoNodos(nodos, intervalo_salud, timeout_conexion)
+        self.url = nodos[0].url
+        self.timeout = (timeout_conexion, timeout_lectura)
+        # timeout_lectura limita la pausa entre fragmentos; timeout_total, la duración completa de la respuesta
+        self.timeout_total = timeout_total
+        self.reintentos = reintentos
+        self.backoff = backoff
+        varios = len(self.grupo.nodos) > 1
+
+        # Reintentar errores de conexión y 5xx con espera exponencial (backoff, 2*backoff, 4*backoff...).
+        # Con varios servidores los reintentos los hace post() en otro nodo.
+        politica_reintentos = Retry(
+            total=reintentos,
+            connect=reintentos,
+            read=reintentos,
+            status=reintentos,
+            backoff_factor=backoff,
+            status_forcelist=ESTADOS_REINTENTABLES,
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False
+        ) if not varios else Retry(total=0, raise_on_status=False)
+        adaptador = HTTPAdapter(pool_connections=max(tamano_pool, len(self.grupo.nodos)), pool_maxsize=tamano_pool,
+                                max_retries=politica_reintentos)
+
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json'})
+        self.session.mount('http://', adaptador)
+        self.session.mount('https://', adaptador)
+
+    # Función para enviar un payload a la API; devuelve el objeto Response de requests.
+    # El nodo elegido cuenta la solicitud en vuelo hasta que se cierra la respuesta (with ... as response).
+    # Un error al leer el cuerpo llega después de devolver la respuesta: quien la lee lo informa con
+    # marcar_fallo (leer_respuesta_stream lo hace solo) para que el nodo no quede como sano.
+    def post(self, payload, headers=None, stream=False, url=None):
+        if url:
+            return self.session.post(url, json=payload, headers=headers, stream=stream, timeout=self.timeout)
+
+        excluidos = []
+        intentos = self.reintentos + 1 if len(self.grupo.nodos) > 1 else 1
+        for intento in range(intentos):
+            nodo = self.grupo.elegir(excluidos)
+            try:
+                response = self.session.post(nodo.url, json=payload, headers=headers, stream=stream, timeout=self.timeout)
+            except requests.RequestException as e:
+                self.grupo.liberar(nodo, exito=False)
+                if intento == intentos - 1:
+                    raise
+                logger.warning(f"Falló la solicitud a {nodo.host}, se reintenta en otro nodo: {e}")
+            else:
+                fallo = response.status_code in ESTADOS_REINTENTABLES
+                if not fallo or intento == intentos - 1:
+                    self._liberar_al_cerrar(response, nodo, not fallo)
+                    return response
+                response.close()
+                self.grupo.liberar(nodo, exito=False)
+                logger.warning(f"{nodo.host} respondió {response.status_code}, se reintenta en otro nodo")
+
+            excluidos.append(nodo)
+            # Todos los nodos fallaron en esta ronda: esperar antes de volver a probarlos
+            if len(excluidos) >= len(self.grupo.nodos):
+                time.sleep(self.backoff * 2 ** (intento // len(self.grupo.nodos)))
+                excluidos = []
+
+    # Función para descontar la solicitud del nodo cuando el llamador cierra la respuesta, con el resultado
+    # que tenga en ese momento (el del estado HTTP, salvo que la lectura del cuerpo lo marque como fallo)
+    def _liberar_al_cerrar(self, response, nodo, exito):
+        cerrar = response.close
+        liberado = []
+        response.exito_nodo = exito
+
+        def cerrar_y_liberar():
+            try:
+                cerrar()
+            finally:
+                if not liberado:
+                    liberado.append(True)
+                    self.grupo.liberar(nodo, response.exito_nodo)
+
+        response.close = cerrar_y_liberar
+
+    def resumen(self):
+        return self.grupo.resumen()
+
+    def cerrar(self):
+        self.grupo.detener()
+        self.session.close()
+
+
+# Función para informar que una respuesta de post() falló al leerla; el nodo se libera como fallido al cerrarla
+def marcar_fallo(response):
+    response.exito_nodo = False
+
+
+# Función para leer una respuesta NDJSON en streaming de Ollama.
+# Junta los fragmentos en una lista (sin concatenar en cada token), se detiene en el fragmento
+# con done: true y devuelve el texto completo junto con las estadísticas de ese fragmento final.
+# Lanza RespuestaOllamaError si llega un fragmento {"error": ...} o si el stream termina sin done: true;
+# ante cualquier error de lectura marca la respuesta como fallida para el nodo que la atendió.
+# Si se pasa `inicio` (time.perf_counter() antes de enviar), añade el tiempo hasta el primer token y,
+# con `timeout_total`, lanza requests.Timeout si la respuesta completa tarda más que eso.
+def leer_respuesta_stream(response, inicio=None, timeout_total=None):
+    try:
+        return _leer_stream(response, inicio, timeout_total)
+    except requests.RequestException:
+        marcar_fallo(response)
+        raise
+
+
+def _leer_stream(response, inicio, timeout_total):
+    fragmentos = []
+    estadisticas = {}
+    primer_token = None
+    for line in response.iter_lines():
+        if not line:
+            continue
+        try:
+            fragment = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"Error al decodificar la línea: {line.decode('utf-8', errors='replace')}")
+            continue
+        if timeout_total and inicio is not None and time.perf_counter() - inicio > timeout_total:
+            raise requests.Timeout(f"La respuesta superó el tiempo total de {timeout_total} s")
+        if fragment.get("error"):
+            raise RespuestaOllamaError(f"Ollama respondió con un error: {fragment['error']}")
+        texto = fragment.get("response", "")
+        if texto and primer_token is None:
+            primer_token = time.perf_counter()
+        fragmentos.append(texto)
+        if fragment.get("done"):
+            estadisticas = {campo: fragment[campo] for campo in CAMPOS_ESTADISTICAS if campo in fragment}
+            break
+    else:
+        raise RespuestaOllamaError(f"La respuesta terminó sin el fragmento final (done) tras {len(fragmentos)} fragmentos")
+    if inicio is not None and primer_token is not None:
+        estadisticas["tiempo_primer_token_s"] = primer_token - inicio
+    return "".join(fragmentos), estadisticas
+
+
+# Función para crear el cliente con la configuración del archivo .env.
+# API_URL admite varios servidores separados por comas (ver leer_nodos).
+def crear_cliente(url=None, **opciones):
+    configuracion = {
+        "tamano_pool": int(os.getenv('OLLAMA_POOL', '10')),
+        "timeout_conexion": float(os.getenv('OLLAMA_TIMEOUT_CONEXION', '10')),
+        "timeout_lectura": float(os.getenv('OLLAMA_TIMEOUT_LECTURA', '300')),
+        "reintentos": int(os.getenv('OLLAMA_REINTENTOS', '3')),
+        "backoff": float(os.getenv('OLLAMA_BACKOFF', '1.0')),
+        "timeout_total": float(os.getenv('OLLAMA_TIMEOUT_TOTAL', '0')) or None,
+        "intervalo_salud": float(os.getenv('OLLAMA_INTERVALO_SALUD', '10')),
+    }
+    configuracion.update(opciones)
+    return ClienteOllama(url, **configuracion)
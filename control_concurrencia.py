@@ -0,0 +1,122 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+# Control AIMD del número de solicitudes en vuelo hacia Ollama, como el control de congestión de TCP.
+# Cada solicitud que termina bien sin señales de saturación suma 1/límite (un lugar más por ventana
+# completa); un error, una espera en cola larga o una caída del ritmo de tokens multiplican el límite
+# por `factor_recorte`. Así el rendimiento se acerca a la capacidad del servidor sin ajustarlo a mano.
+class ControlConcurrencia:
+    def __init__(self, inicial=2, minimo=1, maximo=16, factor_recorte=0.5, umbral_espera=0.5, umbral_tokens=0.5):
+        self.minimo = max(1, minimo)
+        self.maximo = max(self.minimo, maximo)
+        self.limite = float(min(max(inicial, self.minimo), self.maximo))
+        self.factor_recorte = factor_recorte
+        # Fracción de la latencia que puede pasar en cola (fuera de la evaluación del modelo) sin ser saturación
+        self.umbral_espera = umbral_espera
+        # Fracción del mejor ritmo de tokens por solicitud por debajo de la cual se considera saturación
+        self.umbral_tokens = umbral_tokens
+
+        self.errores = 0
+        self.recortes = 0
+        self.limite_maximo_alcanzado = self.limite
+        self._en_vuelo = 0
+        self._completadas = 0
+        # Sin recortes todavía: el primero se aplica en cuanto llega la primera señal
+        self._completadas_al_recortar = float('-inf')
+        self._mejor_tokens_por_segundo = None
+        self._condicion = threading.Condition()
+
+    def adquirir(self):
+        with self._condicion:
+            while self._en_vuelo >= int(self.limite):
+                self._condicion.wait()
+            self._en_vuelo += 1
+
+    # Función para informar cómo terminó una solicitud y ajustar el límite.
+    # `estadisticas` son las del fragmento final de Ollama (duraciones en nanosegundos).
+    def liberar(self, exito, latencia=None, estadisticas=None):
+        with self._condicion:
+            self._en_vuelo -= 1
+            self._completadas += 1
+            if not exito:
+                self.errores += 1
+                self._recortar("error")
+            elif self._saturado(latencia, estadisticas):
+                self._recortar("saturación")
+            else:
+                self.limite = min(self.maximo, self.limite + 1 / self.limite)
+                self.limite_maximo_alcanzado = max(self.limite_maximo_alcanzado, self.limite)
+            self._condicion.notify_all()
+
+    # Función para decidir si una solicitud exitosa muestra saturación del servidor
+    def _saturado(self, latencia, estadisticas):
+        if not latencia or not estadisticas:
+            return False
+        servicio = sum(estadisticas.get(campo, 0) for campo in ("load_duration", "prompt_eval_duration", "eval_duration")) / 1e9
+        # Lo que no fue cargar el modelo, evaluar el prompt o generar tokens es espera en la cola del servidor
+        if servicio and latencia - servicio > self.umbral_espera * latencia:
+            return True
+
+        tokens = estadisticas.get("eval_count")
+        duracion = estadisticas.get("eval_duration")
+        if tokens and duracion:
+            tokens_por_segundo = tokens / (duracion / 1e9)
+            if self._mejor_tokens_por_segundo is None or tokens_por_segundo > self._mejor_tokens_por_segundo:
+                self._mejor_tokens_por_segundo = tokens_por_segundo
+            elif tokens_por_segundo < self.umbral_tokens * self._mejor_tokens_por_segundo:
+                return True
+        return False
+
+    # Un solo recorte por ventana: las solicitudes que ya estaban en vuelo se enviaron con el límite anterior
+    # y sus resultados no deben volver a recortarlo. La ventana empieza con el primer recorte, que es inmediato.
+    def _recortar(self, motivo):
+        if self._completadas - self._completadas_al_recortar < int(self.limite):
+            return
+        anterior = self.limite
+        self.limite = max(float(self.minimo), self.limite * self.factor_recorte)
+        self._completadas_al_recortar = self._completadas
+        if self.limite == anterior:
+            return
+        self.recortes += 1
+        logger.info(f"Concurrencia reducida de {anterior:.1f} a {self.limite:.1f} por {motivo}")
+
+    # Uso: with control.solicitud() as resultado: ...; resultado.update(exito=True, latencia=..., estadisticas=...)
+    # Si el bloque termina con una excepción o sin marcar éxito, cuenta como error.
+    @contextmanager
+    def solicitud(self):
+        self.adquirir()
+        resultado = {"exito": False, "latencia": None, "estadisticas": None}
+        try:
+            yield resultado
+        finally:
+            self.liberar(resultado["exito"], resultado["latencia"], resultado["estadisticas"])
+
+    def resumen(self):
+        with self._condicion:
+            return {
+                "limite_final": round(self.limite, 2),
+                "limite_maximo_alcanzado": round(self.limite_maximo_alcanzado, 2),
+                "maximo": self.maximo,
+                "recortes": self.recortes,
+                "errores": self.errores,
+                "solicitudes": self._completadas
+            }
+
+
+# Función para crear el control con la configuración del archivo .env.
+# Con CONCURRENCIA_ADAPTATIVA=0 el límite queda fijo en `maximo`.
+def crear_control(maximo, **opciones):
+    if os.getenv('CONCURRENCIA_ADAPTATIVA', '1') != '1':
+        return ControlConcurrencia(inicial=maximo, minimo=maximo, maximo=maximo)
+    configuracion = {
+        "inicial": int(os.getenv('CONCURRENCIA_INICIAL', '2')),
+        "minimo": int(os.getenv('CONCURRENCIA_MINIMA', '1')),
+        "factor_recorte": float(os.getenv('CONCURRENCIA_FACTOR_RECORTE', '0.5')),
+    }
+    configuracion.update(opciones)
+    return ControlConcurrencia(maximo=maximo, **configuracion)
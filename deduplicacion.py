@@ -0,0 +1,156 @@
+import hashlib
+import html
+import json
+import os
+import re
+import unicodedata
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Parámetros de URL que solo sirven para rastreo y no cambian el artículo
+PARAMETROS_RASTREO = {"partner", "fbclid", "gclid", "ref", "rss", "source", "mc_cid", "mc_eid"}
+
+# Valores de relleno que pone normalizar_noticia cuando falta un campo
+VALORES_NO_DISPONIBLES = {"", "URL no disponible", "ID no disponible", "Contenido no disponible"}
+
+# Parámetros de MinHash: 32 permutaciones en 8 bandas de 4 filas (candidatos a partir de ~60 % de similitud)
+NUM_PERMUTACIONES = 32
+FILAS_POR_BANDA = 4
+LONGITUD_SHINGLE = 5
+MAX_PALABRAS = 300
+MIN_PALABRAS = 20
+PRIMO = (1 << 61) - 1
+
+# Coeficientes fijos para que las firmas sean comparables entre ejecuciones
+_COEFICIENTES = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), 'big') % PRIMO or 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), 'big') % PRIMO)
+    for i in range(NUM_PERMUTACIONES)
+]
+
+_RE_ETIQUETAS = re.compile(r'<[^>]+>')
+_RE_NO_ALFANUMERICO = re.compile(r'[^a-z0-9ñ]+')
+
+
+# Función para llevar una URL a su forma canónica (sin www, rastreo, fragmento ni barra final)
+def canonizar_url(url):
+    if not url or url in VALORES_NO_DISPONIBLES:
+        return None
+    partes = urlsplit(url.strip())
+    host = partes.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    parametros = [
+        (clave, valor) for clave, valor in parse_qsl(partes.query)
+        if clave.lower() not in PARAMETROS_RASTREO and not clave.lower().startswith('utm_')
+    ]
+    ruta = partes.path.rstrip('/') or '/'
+    return urlunsplit(('https', host, ruta, urlencode(sorted(parametros)), ''))
+
+
+# Función para convertir el contenido HTML en una lista de palabras comparables
+def palabras_normalizadas(contenido):
+    texto = html.unescape(_RE_ETIQUETAS.sub(' ', contenido or ''))
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(caracter for caracter in texto if not unicodedata.combining(caracter))
+    return _RE_NO_ALFANUMERICO.sub(' ', texto).split()
+
+
+# Función para calcular la firma MinHash de las primeras palabras de una noticia
+def firma_minhash(palabras):
+    palabras = palabras[:MAX_PALABRAS]
+    shingles = {
+        ' '.join(palabras[i:i + LONGITUD_SHINGLE])
+        for i in range(max(1, len(palabras) - LONGITUD_SHINGLE + 1))
+    }
+    bases = [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for shingle in shingles
+    ]
+    return [min((a * base + b) % PRIMO for base in bases) for a, b in _COEFICIENTES]
+
+
+# Función para estimar la similitud de Jaccard a partir de dos firmas
+def similitud(firma_a, firma_b):
+    return sum(1 for a, b in zip(firma_a, firma_b) if a == b) / len(firma_a)
+
+
+# Índice persistente de noticias ya vistas: URL canónica, guid, hash del contenido y bandas MinHash.
+# Detecta copias exactas entre snapshots y casi-duplicados como la misma nota de agencia en dos medios.
+class IndiceDeduplicacion:
+    def __init__(self, ruta='./clean/indice_dedup.json', umbral_similitud=0.8):
+        self.ruta = ruta
+        self.umbral_similitud = umbral_similitud
+        self.urls = set()
+        self.guids = set()
+        self.hashes = set()
+        self.bandas = {}
+        self.firmas = []
+        self.duplicados = 0
+
+    def cargar(self):
+        if not os.path.exists(self.ruta):
+            return self
+        with open(self.ruta, 'r', encoding='utf-8') as file:
+            datos = json.load(file)
+        self.urls = set(datos["urls"])
+        self.guids = set(datos["guids"])
+        self.hashes = set(datos["hashes"])
+        self.firmas = datos["firmas"]
+        for posicion, firma in enumerate(self.firmas):
+            for banda in self._bandas(firma):
+                self.bandas.setdefault(banda, []).append(posicion)
+        return self
+
+    def guardar(self):
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as file:
+            json.dump({
+                "urls": sorted(self.urls),
+                "guids": sorted(self.guids),
+                "hashes": sorted(self.hashes),
+                "firmas": self.firmas
+            }, file)
+        os.replace(temporal, self.ruta)
+
+    @staticmethod
+    def _bandas(firma):
+        return [
+            f"{inicio}:" + ','.join(str(valor) for valor in firma[inicio:inicio + FILAS_POR_BANDA])
+            for inicio in range(0, len(firma), FILAS_POR_BANDA)
+        ]
+
+    # Función para decidir si una noticia ya está en el índice; si no lo está, la registra
+    def es_duplicada(self, noticia):
+        url = canonizar_url(noticia.get("url"))
+        guid = noticia.get("guid")
+        guid = None if guid in VALORES_NO_DISPONIBLES else guid
+        palabras = palabras_normalizadas(noticia.get("contenido"))
+
+        # Los textos muy cortos (o de relleno) coinciden por casualidad; solo se comparan por URL y guid
+        comparar_contenido = len(palabras) >= MIN_PALABRAS
+        hash_contenido = hashlib.sha256(' '.join(palabras).encode('utf-8')).hexdigest() if comparar_contenido else None
+
+        if (url and url in self.urls) or (guid and guid in self.guids) or (hash_contenido and hash_contenido in self.hashes):
+            self.duplicados += 1
+            return True
+
+        firma = firma_minhash(palabras) if comparar_contenido else None
+        if firma:
+            bandas = self._bandas(firma)
+            candidatos = {posicion for banda in bandas for posicion in self.bandas.get(banda, [])}
+            if any(similitud(firma, self.firmas[posicion]) >= self.umbral_similitud for posicion in candidatos):
+                self.duplicados += 1
+                return True
+
+        if url:
+            self.urls.add(url)
+        if guid:
+            self.guids.add(guid)
+        if hash_contenido:
+            self.hashes.add(hash_contenido)
+        if firma:
+            posicion = len(self.firmas)
+            self.firmas.append(firma)
+            for banda in bandas:
+                self.bandas.setdefault(banda, []).append(posicion)
+        return False
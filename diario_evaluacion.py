@@ -0,0 +1,90 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+# Función para identificar una noticia: por su URL o, si no tiene, por el hash de su contenido
+def clave_noticia(noticia):
+    url = noticia.get("url")
+    if url and url != "URL no disponible":
+        return url
+    contenido = f"{noticia.get('titulo', '')}\n{noticia.get('contenido', '')}"
+    return "sha256:" + hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+# Diario JSONL de evaluaciones: una noticia evaluada por línea, escrita y sincronizada en cuanto termina.
+# Si la ejecución se interrumpe, la siguiente solo evalúa las noticias que aún no están en el diario.
+class DiarioEvaluacion:
+    def __init__(self, ruta='./clean/noticias_con_evaluacion.jsonl'):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._archivo = None
+
+    # Función para leer las evaluaciones ya registradas como {clave: evaluación}.
+    # Con `version` o `modelo` solo cuentan los registros de esa versión del prompt o ese modelo;
+    # los registros antiguos, sin esos campos, valen para cualquiera.
+    def cargar(self, version=None, modelo=None):
+        evaluaciones = {}
+        if not os.path.exists(self.ruta):
+            return evaluaciones
+
+        with open(self.ruta, 'r', encoding='utf-8') as file:
+            for numero, linea in enumerate(file, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    # Una línea a medio escribir al momento de la interrupción; se vuelve a evaluar
+                    logger.warning(f"Línea {numero} del diario incompleta, se ignora")
+                    continue
+                if version is not None and registro.get("version", version) != version:
+                    continue
+                if modelo is not None and registro.get("modelo", modelo) != modelo:
+                    continue
+                evaluaciones[registro["clave"]] = registro["evaluacion"]
+        return evaluaciones
+
+    # Función para contar los registros por (versión, modelo); los antiguos, sin esos campos, cuentan como None
+    def contar(self):
+        conteo = {}
+        if not os.path.exists(self.ruta):
+            return conteo
+        with open(self.ruta, 'r', encoding='utf-8') as file:
+            for linea in file:
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+                clave = (registro.get("version"), registro.get("modelo"))
+                conteo[clave] = conteo.get(clave, 0) + 1
+        return conteo
+
+    # Función para añadir una noticia evaluada al diario; `clave` permite registrar una evaluación
+    # cuando solo se conoce la clave de la noticia
+    def registrar(self, noticia, evaluacion, version=None, modelo=None, clave=None):
+        registro = dict(noticia, clave=clave or clave_noticia(noticia), evaluacion=evaluacion)
+        if version is not None:
+            registro["version"] = version
+        if modelo is not None:
+            registro["modelo"] = modelo
+        linea = json.dumps(registro, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._archivo is None:
+                directorio = os.path.dirname(self.ruta)
+                if directorio:
+                    os.makedirs(directorio, exist_ok=True)
+                self._archivo = open(self.ruta, 'a', encoding='utf-8')
+            self._archivo.write(linea)
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+
+    def cerrar(self):
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
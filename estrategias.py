@@ -0,0 +1,227 @@
+import logging
+
+from almacen import RESPUESTA_SIMPLE
+from extractor_texto import texto_noticia
+from fragmentos import RESPUESTA_FRAGMENTOS, dividir_en_fragmentos, procesar_paquete
+from lotes import RESPUESTA_LOTE, procesar_respuesta_lote
+from parser_anteriores import procesar_respuesta_01, procesar_respuesta_02, procesar_respuesta_03
+from parser_secciones import procesar_respuesta_secciones
+from presupuesto_contenido import contenido_noticia, estimar_tokens
+from salida_json import ESQUEMA_EVALUACION, instrucciones_json, procesar_respuesta_json
+
+logger = logging.getLogger(__name__)
+
+
+# Estrategia de evaluación: cómo se pide la evaluación al modelo y cómo se interpreta la respuesta.
+# `version` identifica sus resultados en el almacén; si cambia el prompt o el parser, cambia la versión.
+class Estrategia:
+    def __init__(self, version, plantilla, procesar, system=None, formato=None, lotes=False, fragmentos=True):
+        self.version = version
+        # La plantilla recibe el texto ya recortado de la noticia como {contenido}
+        self.plantilla = plantilla
+        self.procesar = procesar
+        self.system = system
+        # Esquema JSON para el parámetro `format` de Ollama, o None para texto libre
+        self.formato = formato
+        # Si admite el modo por lotes de lotes.py
+        self.lotes = lotes
+        # Si su evaluación se puede combinar por fragmentos (solo las del formato actual de la evaluación)
+        self.fragmentos = fragmentos
+
+    def crear_prompt(self, contenido):
+        return self.plantilla.format(contenido=contenido)
+
+    # Función para interpretar una respuesta según su `tipo`, que se guarda junto a ella: la de un prompt, el
+    # objeto de una noticia evaluada en un lote (ya en JSON, sea cual sea el parser de la estrategia) o el
+    # paquete de una noticia por fragmentos, con sus `parciales` si ya se interpretaron
+    def interpretar(self, respuesta, tipo=RESPUESTA_SIMPLE, parciales=None):
+        if tipo == RESPUESTA_LOTE:
+            return procesar_respuesta_lote(respuesta)
+        if tipo == RESPUESTA_FRAGMENTOS:
+            return procesar_paquete(self.procesar, respuesta, parciales)
+        return self.procesar(respuesta)
+
+
+ESTRATEGIAS = {}
+
+
+def registrar_estrategia(estrategia):
+    if estrategia.version in ESTRATEGIAS:
+        raise ValueError(f"Ya hay una estrategia registrada con la versión {estrategia.version}")
+    ESTRATEGIAS[estrategia.version] = estrategia
+    return estrategia
+
+
+def obtener_estrategia(version):
+    if version not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia desconocida: {version} (registradas: {', '.join(ESTRATEGIAS)})")
+    return ESTRATEGIAS[version]
+
+
+# Funciones de las etapas de evaluacion0.5.py que pueden correr en otro proceso: reciben la versión y no
+# la estrategia para que functools.partial sobre ellas se pueda enviar a un ProcessPoolExecutor.
+# Con `tokens_fragmento`, las noticias de más de `umbral_fragmentos` tokens se evalúan completas por
+# fragmentos y se devuelve la lista de sus prompts en lugar de un solo prompt con el texto recortado.
+def preparar_prompt(version, presupuesto_tokens, noticia, tokens_fragmento=None, umbral_fragmentos=None,
+                    max_fragmentos=8):
+    estrategia = obtener_estrategia(version)
+    if tokens_fragmento and estrategia.fragmentos:
+        texto = texto_noticia(noticia)
+        if estimar_tokens(texto) > (umbral_fragmentos or tokens_fragmento):
+            return [estrategia.crear_prompt(fragmento)
+                    for fragmento in dividir_en_fragmentos(texto, tokens_fragmento, max_fragmentos)]
+    return estrategia.crear_prompt(contenido_noticia(noticia, presupuesto_tokens))
+
+
+# Recibe (respuesta, tipo, evaluaciones parciales o None) y devuelve (evaluación o None, respuesta, tipo);
+# un error del parser no detiene el resto de la ejecución
+def interpretar_version(version, enviada):
+    respuesta, tipo, parciales = enviada
+    if not respuesta:
+        return None, respuesta, tipo
+    try:
+        return obtener_estrategia(version).interpretar(respuesta, tipo, parciales), respuesta, tipo
+    except Exception as e:
+        logger.error(f"Error al interpretar la respuesta con la versión {version}: {str(e)}", exc_info=True)
+        return None, respuesta, tipo
+
+
+# Función para interpretar una respuesta JSON y, si no es válida, leerla como texto con secciones
+def procesar_json_o_secciones(respuesta):
+    try:
+        return procesar_respuesta_json(respuesta)
+    except ValueError as e:
+        logger.warning(f"Respuesta JSON inválida, se usa el parser de texto: {e}")
+    return procesar_respuesta_secciones(respuesta)
+
+
+# Instrucciones fijas de la evaluación. Van en el campo `system`, que la plantilla de llama3.2 en Ollama
+# coloca en el bloque <|start_header_id|>system<|end_header_id|> al inicio de la conversación; así son
+# un prefijo idéntico en todas las solicitudes y Ollama puede reutilizar su caché KV en lugar de
+# evaluarlas de nuevo para cada noticia.
+SYSTEM_PROMPT = (
+    "Este es un análisis de noticias. Para la noticia que envíe el usuario proporciona:\n"
+    "1. Preguntas que se plantean en el texto.\n"
+    "2. Hechos o evidencias que sustentan el texto.\n"
+    "3. Conclusiones escritas en la noticia.\n"
+    "4. Suposiciones implícitas.\n"
+    "5. Palabras clave importantes.\n"
+    "6. Palabras clave deducidas.\n"
+    "7. Sujetos importantes mencionados.\n"
+    "8. Lugares físicos mencionados.\n"
+    "9. Medios de información o sitios web mencionados.\n"
+)
+
+# Prompts de evaluacion.py a evaluacion0.3.py, con sus parsers y su formato de evaluación, para poder
+# evaluar con ellos solo las noticias que les faltan y comparar sus resultados con los de las demás versiones
+PUNTOS_ETIQUETAS = (
+    "Analiza la siguiente noticia y proporciona una evaluación con los siguientes puntos:\n"
+    "1. Orientación política (izquierda, centro, derecha)\n"
+    "2. Sentimiento (positivo, negativo, neutral)\n"
+    "3. Estado o país mencionado\n"
+    "4. Nivel de agresividad (baja, media, alta)\n"
+    "5. Violencia (sí, no)\n"
+    "6. Controversia (alta, media, baja)\n\n"
+)
+
+# evaluacion.py no interpretaba la respuesta; pide los mismos seis puntos que 0.1, así que usa su parser
+registrar_estrategia(Estrategia(
+    "0.0",
+    PUNTOS_ETIQUETAS +
+    "Noticia:\n{contenido}\n"
+    "Por favor, evalúa cada aspecto de manera clara y concisa.",
+    procesar_respuesta_01,
+    fragmentos=False
+))
+
+registrar_estrategia(Estrategia(
+    "0.1",
+    PUNTOS_ETIQUETAS +
+    "Noticia:\n{contenido}\n"
+    "Por favor, evalúa cada aspecto de manera clara y concisa y regresa la respuesta en una sola palabra de cada "
+    "una de las 6 evaluaciones, omite cualquier detalle, solo da una palabra de respuesta y NUNCA incluyas "
+    "caracteres especiales.",
+    procesar_respuesta_01,
+    fragmentos=False
+))
+
+registrar_estrategia(Estrategia(
+    "0.2",
+    "Analiza la siguiente noticia y proporciona una evaluación con los siguientes puntos:\n"
+    "1. Orientación política (izquierda, centro, derecha)\n"
+    "2. Sentimiento basado en la teora de Paul Ekman\n"
+    "3. Estado o país mencionado\n"
+    "4. Nivel de agresividad (baja, media, alta)\n"
+    "5. Violencia (sí, no)\n"
+    "6. Controversia (alta, media, baja)\n"
+    "7. 'questions': las preguntas que se plantean en el texto.\n"
+    "8. 'evidences': hechos o evidencias que sustentan el texto.\n"
+    "9. 'conclusions': las conclusiones expresas de la noticia.\n"
+    "10. 'hiddenConclusions': suposiciones implícitas.\n"
+    "11. 'keyWords': palabras clave más importantes.\n"
+    "12. 'deductedKeyWords': palabras clave deducidas de preguntas, evidencias y conclusiones.\n"
+    "13. 'subjects': sujetos importantes del texto.\n"
+    "14. 'landPlaces': lugares físicos mencionados.\n"
+    "15. 'virtualPlaces': sitios web o medios mencionados.\n\n"
+    "Noticia:\n{contenido}\n"
+    "Evalúa cada aspecto de manera clara y concisa, el resultado debe ser exactamente lo que se pide",
+    procesar_respuesta_02,
+    fragmentos=False
+))
+
+registrar_estrategia(Estrategia(
+    "0.3",
+    "De acuerdo al modelo Questions/Evidences/Conclusions, evalúa el texto con los siguientes parámetros:\n"
+    "1. 'questions': preguntas que se plantean en el texto.\n"
+    "2. 'evidences': hechos o evidencias que sustentan el texto.\n"
+    "3. 'conclusions': las conclusiones escritas en la noticia.\n"
+    "4. 'hiddenConclusions': suposiciones implícitas.\n\n"
+    "Aparte, proporciona:\n"
+    "5. 'keyWords': las palabras clave más importantes del texto.\n"
+    "6. 'deductedKeyWords': palabras clave deducidas de questions, evidences y conclusions.\n"
+    "7. 'subjects': los sujetos importantes mencionados.\n"
+    "8. 'landPlaces': lugares físicos mencionados.\n"
+    "9. 'virtualPlaces': medios de información o sitios web mencionados.\n\n"
+    "Noticia:\n{contenido}\n"
+    "Evalúa cada parámetro de manera clara y concisa.",
+    procesar_respuesta_03,
+    fragmentos=False
+))
+
+# Prompt de evaluacion0.4.py: las instrucciones van en el mismo texto que la noticia
+registrar_estrategia(Estrategia(
+    "0.4",
+    "System: Este es un análisis de noticias.\n"
+    "User: Por favor, analiza la siguiente noticia y proporciona:\n"
+    "{contenido}\n"
+    "Assistant: Proporciona:\n"
+    "1. Preguntas que se plantean en el texto.\n"
+    "2. Hechos o evidencias que sustentan el texto.\n"
+    "3. Conclusiones escritas en la noticia.\n"
+    "4. Suposiciones implícitas.\n"
+    "5. Palabras clave importantes.\n"
+    "6. Palabras clave deducidas.\n"
+    "7. Sujetos importantes mencionados.\n"
+    "8. Lugares físicos mencionados.\n"
+    "9. Medios de información o sitios web mencionados.\n",
+    procesar_respuesta_secciones
+))
+
+# Instrucciones como prefijo `system` estable y respuesta en texto libre (SALIDA_JSON=0)
+registrar_estrategia(Estrategia(
+    "0.5-texto",
+    "Por favor, analiza la siguiente noticia:\n{contenido}\n",
+    procesar_respuesta_secciones,
+    system=SYSTEM_PROMPT,
+    lotes=True
+))
+
+# Como la anterior, con salida JSON restringida al esquema de la evaluación
+registrar_estrategia(Estrategia(
+    "0.5",
+    "Por favor, analiza la siguiente noticia:\n{contenido}\n",
+    procesar_json_o_secciones,
+    system=SYSTEM_PROMPT + instrucciones_json(),
+    formato=ESQUEMA_EVALUACION,
+    lotes=True
+))
@@ -1,231 +1,428 @@
 import json
 import requests
 import os
-import re
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 import logging
-import nltk
-from nltk.tokenize import word_tokenize
-
-# Descargar los recursos de NLTK necesarios para tokenizar
-nltk.download('punkt')
+import time
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from motor_evaluacion import evaluar_en_etapas, evaluar_en_paralelo
+from cache_respuestas import CacheRespuestas
+from cliente_ollama import crear_cliente, leer_nodos, leer_respuesta_stream
+from control_concurrencia import crear_control
+from diario_evaluacion import clave_noticia
+from almacen import RESPUESTA_SIMPLE, crear_almacen
+from telemetria import RegistroMetricas, crear_registro
+from estrategias import interpretar_version, obtener_estrategia, preparar_prompt
+from lotes import RESPUESTA_LOTE, SYSTEM_PROMPT_LOTE, SYSTEM_PROMPT_LOTE_JSON, agrupar_en_lotes, crear_prompt_lote, extraer_objetos_lote
+from presupuesto_contenido import contenido_noticia, estimar_tokens
+from extractor_texto import texto_noticia
+from salida_json import ESQUEMA_LOTE, normalizar_evaluacion
+from triaje import crear_triaje
+from fragmentos import RESPUESTA_FRAGMENTOS, SYSTEM_PROMPT_REDUCCION, crear_prompt_reduccion, empaquetar_respuestas
+from planificador import crear_planificador, leer_fecha
 
 # Cargar las variables de entorno
 load_dotenv()
 API_URL = os.getenv('API_URL')
 
-# Ruta del archivo JSON con las noticias
-noticias_file_path = './clean/noticias.json'
-
-# Función para leer el archivo JSON
-def leer_noticias():
-    with open(noticias_file_path, 'r', encoding='utf-8') as file:
-        return json.load(file)
-
-# Función para limpiar el contenido HTML
-def limpiar_html(contenido):
-    return BeautifulSoup(contenido, "html.parser").get_text()
-
-# Función para truncar el contenido de la noticia si es muy largo
-def truncar_texto(texto, limite=1500):
-    return texto[:limite] + '...' if len(texto) > limite else texto
-
-# Función para crear el prompt simplificado
-def crear_prompt(noticia):
-    contenido_limpio = limpiar_html(noticia["contenido"])
-    contenido_truncado = truncar_texto(contenido_limpio)
-
-    prompt = (
-        "System: Este es un análisis de noticias.\n"
-        "User: Por favor, analiza la siguiente noticia y proporciona:\n"
-        f"{contenido_truncado}\n"
-        "Assistant: Proporciona:\n"
-        "1. Preguntas que se plantean en el texto.\n"
-        "2. Hechos o evidencias que sustentan el texto.\n"
-        "3. Conclusiones escritas en la noticia.\n"
-        "4. Suposiciones implícitas.\n"
-        "5. Palabras clave importantes.\n"
-        "6. Palabras clave deducidas.\n"
-        "7. Sujetos importantes mencionados.\n"
-        "8. Lugares físicos mencionados.\n"
-        "9. Medios de información o sitios web mencionados.\n"
-    )
-
-    return prompt
-
-# Función para enviar el contenido de la noticia al modelo Llama 3.2 y gestionar respuestas fragmentadas
-def enviar_a_nlp(noticia):
+# API_URL puede listar varios servidores de Ollama separados por comas, con peso opcional ("url|2")
+NODOS = max(1, len(leer_nodos(API_URL)))
+
+# Límite de solicitudes simultáneas enviadas a Ollama. Con CONCURRENCIA_ADAPTATIVA=1 (por defecto) es el
+# techo del control AIMD, que ajusta las solicitudes en vuelo según errores, espera en cola y tokens/s;
+# con CONCURRENCIA_ADAPTATIVA=0 es un número fijo. El valor por defecto crece con el número de servidores.
+ADAPTATIVA = os.getenv('CONCURRENCIA_ADAPTATIVA', '1') == '1'
+MAX_CONCURRENCIA = int(os.getenv('MAX_CONCURRENCIA', str((16 if ADAPTATIVA else 4) * NODOS)))
+
+# Salida JSON restringida con el esquema de la evaluación (parámetro `format` de Ollama);
+# SALIDA_JSON=0 vuelve al texto libre interpretado con el parser de secciones
+MODO_JSON = os.getenv('SALIDA_JSON', '1') == '1'
+
+# Versiones de las estrategias (prompt + parser) de estrategias.py que se evalúan, separadas por comas.
+# Cada ejecución solo evalúa los pares (noticia, versión) que faltan en el almacén.
+VERSIONES = [version.strip() for version in os.getenv('ESTRATEGIAS', '0.5' if MODO_JSON else '0.5-texto').split(',')
+             if version.strip()]
+
+# Tokens de la noticia que se envían al modelo (sustituye al corte de 1500 caracteres)
+PRESUPUESTO_TOKENS = int(os.getenv('PRESUPUESTO_TOKENS', '400'))
+
+# Tiempo que Ollama mantiene el modelo cargado entre solicitudes (evita recargarlo en ejecuciones lentas)
+KEEP_ALIVE = os.getenv('KEEP_ALIVE', '30m')
+
+# Evaluación por fragmentos (FRAGMENTOS=1): las noticias de más de UMBRAL_FRAGMENTOS tokens se evalúan
+# completas, en fragmentos de TOKENS_FRAGMENTO tokens enviados a la vez, y las listas se combinan sin
+# repetidos. Si el texto necesita más de MAX_FRAGMENTOS, los fragmentos se agrandan para cubrirlo entero.
+# Con REDUCIR_RESUMEN=1 una llamada corta más escribe el resumen a partir de los parciales.
+MODO_FRAGMENTOS = os.getenv('FRAGMENTOS', '0') == '1'
+OPCIONES_FRAGMENTOS = {
+    "tokens_fragmento": int(os.getenv('TOKENS_FRAGMENTO', '1000')),
+    "umbral_fragmentos": int(os.getenv('UMBRAL_FRAGMENTOS', '1500')),
+    "max_fragmentos": int(os.getenv('MAX_FRAGMENTOS', '8')),
+} if MODO_FRAGMENTOS else {}
+REDUCIR_RESUMEN = os.getenv('REDUCIR_RESUMEN', '0') == '1'
+
+# Procesos para preparar los prompts e interpretar las respuestas mientras los hilos esperan al modelo;
+# PROCESOS_ETAPAS=0 hace esas etapas en los mismos hilos. TAMANO_COLA acota las noticias en cada cola.
+PROCESOS_ETAPAS = int(os.getenv('PROCESOS_ETAPAS', '2'))
+TAMANO_COLA = int(os.getenv('TAMANO_COLA', '0')) or None
+
+# Modo por lotes: varias noticias cortas en una sola solicitud (LOTES=1), con presupuesto de tokens por lote
+MODO_LOTES = os.getenv('LOTES', '0') == '1'
+PRESUPUESTO_LOTE = int(os.getenv('PRESUPUESTO_LOTE', '2000'))
+MAX_NOTICIAS_LOTE = int(os.getenv('MAX_NOTICIAS_LOTE', '8'))
+
+# Caché de respuestas en disco; CACHE_DESACTIVADO=1 obliga a consultar siempre al modelo
+cache = CacheRespuestas(
+    directorio=os.getenv('CACHE_DIR', './cache/respuestas'),
+    max_bytes=int(os.getenv('CACHE_MAX_MB', '200')) * 1024 * 1024,
+    activo=os.getenv('CACHE_DESACTIVADO', '0') != '1'
+)
+
+# Cliente con pool de conexiones compartido por todos los hilos; una conexión por solicitud en vuelo
+cliente = crear_cliente(API_URL, tamano_pool=MAX_CONCURRENCIA)
+
+# Control de las solicitudes en vuelo; los aciertos de la caché no pasan por él
+control = crear_control(MAX_CONCURRENCIA)
+
+# Triaje local antes del modelo (TRIAJE=0 lo desactiva): las noticias sin cuerpo, de una línea o poco
+# relevantes no se envían al modelo. El motivo se guarda en el almacén y sale en la exportación como
+# "omitida", pero no cuentan como evaluadas: el triaje se repite en cada ejecución, así que vuelven a
+# considerarse si cambian sus textos o los umbrales.
+triaje = crear_triaje()
+
+# Orden de evaluación por prioridad (recencia, fuente, sección, longitud) con cuota por fuente;
+# PRIORIDAD=0 evalúa en el orden del almacén
+planificador = crear_planificador()
+
+# Noticias pendientes que se leen del almacén a la vez para el triaje y el orden de prioridad: la prioridad
+# ordena dentro de cada bloque y la memoria queda acotada por su tamaño, no por el del corpus
+BLOQUE_PENDIENTES = int(os.getenv('BLOQUE_PENDIENTES', '2000'))
+
+# Métricas de cada llamada al modelo (latencia, tokens, primer token); resumen al final de la ejecución
+metricas = RegistroMetricas(os.getenv('METRICAS_FILE', './metricas/llamadas_ollama.jsonl'))
+
+logger = logging.getLogger(__name__)
+
+# Modelo; las evaluaciones se guardan por (noticia, versión de la estrategia, modelo)
+MODELO = 'llama3.2'
+
+# Con ALMACEN=json: archivo con las noticias, JSON (lista) o JSONL (una noticia por línea), y diario
+# donde se guarda cada noticia evaluada en cuanto termina. Con SQLite (por defecto) todo va en clean/noticias.db.
+noticias_file_path = os.getenv('NOTICIAS_FILE', './clean/noticias.json')
+diario_file_path = './clean/noticias_con_evaluacion.jsonl'
+
+# Función para obtener el texto de la noticia que se envía al modelo (ver presupuesto_contenido.contenido_noticia)
+def preparar_contenido(noticia):
+    return contenido_noticia(noticia, PRESUPUESTO_TOKENS)
+
+# Función para enviar la noticia al modelo Llama 3.2 con el prompt y las instrucciones de una estrategia
+def enviar_a_nlp(noticia, estrategia):
+    return enviar_prompts(noticia, preparar_prompt(estrategia.version, PRESUPUESTO_TOKENS, noticia, **OPCIONES_FRAGMENTOS),
+                          estrategia)
+
+# Función para enviar el prompt ya preparado de una noticia, o los de sus fragmentos si es una lista.
+# Devuelve (respuesta, tipo de la respuesta, evaluaciones parciales de los fragmentos o None).
+def enviar_prompts(noticia, prompt, estrategia):
+    if isinstance(prompt, list):
+        return enviar_fragmentos(noticia, prompt, estrategia)
+    return (enviar_prompt(prompt, clave_noticia(noticia), noticia['titulo'], estrategia.system, estrategia.formato),
+            RESPUESTA_SIMPLE, None)
+
+# Función para evaluar los fragmentos de una noticia larga a la vez (el control de concurrencia sigue
+# limitando las solicitudes en vuelo) y devolver sus respuestas en un paquete. Si falla algún fragmento
+# la noticia queda pendiente; los que sí respondieron quedan en la caché para el siguiente intento.
+# Con REDUCIR_RESUMEN los fragmentos se interpretan aquí para escribir el resumen y esas evaluaciones
+# parciales se devuelven para no interpretarlos otra vez.
+def enviar_fragmentos(noticia, prompts, estrategia):
+    clave = clave_noticia(noticia)
+    logger.info(f"Noticia evaluada en {len(prompts)} fragmentos: {noticia['titulo']}")
+    with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
+        respuestas = list(executor.map(
+            lambda numero_prompt: enviar_prompt(numero_prompt[1], f"{clave}#{numero_prompt[0]}",
+                                                f"{noticia['titulo']} (fragmento {numero_prompt[0]})",
+                                                estrategia.system, estrategia.formato),
+            enumerate(prompts, 1)
+        ))
+    if not all(respuestas):
+        logger.warning(f"{respuestas.count(None)} de {len(prompts)} fragmentos sin respuesta: {noticia['titulo']}")
+        return None, RESPUESTA_FRAGMENTOS, None
+
+    resumen = None
+    parciales = None
+    if REDUCIR_RESUMEN:
+        try:
+            parciales = [estrategia.procesar(respuesta) for respuesta in respuestas]
+            resumenes = [parcial.get("resumen") for parcial in parciales]
+            resumenes = [texto for texto in resumenes if texto and texto != "No evaluado"]
+            if len(resumenes) > 1:
+                resumen = enviar_prompt(crear_prompt_reduccion(resumenes), f"{clave}#resumen",
+                                        f"{noticia['titulo']} (resumen)", SYSTEM_PROMPT_REDUCCION)
+        except Exception as e:
+            logger.warning(f"No se pudo escribir el resumen de {noticia['titulo']}: {e}")
+    return empaquetar_respuestas(respuestas, resumen.strip() if resumen else None), RESPUESTA_FRAGMENTOS, parciales
+
+# Función para enviar un prompt ya construido; `id_llamada` identifica la llamada en las métricas,
+# `system` son las instrucciones fijas y `formato`, si se indica, es el esquema JSON al que Ollama
+# debe restringir la respuesta
+def enviar_prompt(prompt, id_llamada, descripcion, system, formato=None):
+    inicio = time.perf_counter()
     try:
-        # Crear el prompt con instrucciones
-        prompt = crear_prompt(noticia)
-        
         # Payload para enviar a la API
         payload = {
-            "model": "llama3.2",  
+            "model": MODELO,
+            "system": system,
             "prompt": prompt,
-            "max_tokens": 10000
+            "max_tokens": 10000,
+            "keep_alive": KEEP_ALIVE
         }
+        if formato:
+            payload["format"] = formato
+
+        # Si el mismo prompt ya se envió con el mismo modelo y opciones, reutilizar la respuesta
+        respuesta_cache = cache.obtener(payload)
+        if respuesta_cache is not None:
+            logger.debug(f"Respuesta obtenida de la caché para: {descripcion}")
+            return respuesta_cache
 
         # Headers para la solicitud
         headers = {
             'Content-Type': 'application/json',
         }
 
-        # Depuración: Imprimir el payload antes de enviar
-        print(f"Enviando payload: {payload}")
+        # Depuración: el payload completo solo se muestra con nivel DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Enviando payload: {payload}")
         
-        # Solicitud POST a la API, con stream=True para manejar la respuesta por fragmentos
-        response = requests.post(API_URL, headers=headers, json=payload, stream=True)
-
-        # Acumular la respuesta completa de los fragmentos
-        full_response = ""
-        for line in response.iter_lines():
-            if line:
-                try:
-                    # Decodificar cada fragmento como JSON
-                    fragment = json.loads(line)
-                    full_response += fragment.get("response", "")
-                except json.JSONDecodeError:
-                    print(f"Error al decodificar la línea: {line.decode('utf-8')}")
-
-        # Verificar si la solicitud fue exitosa
-        if response.status_code == 200:
-            print(f"Respuesta completa recibida:\n{full_response}")
-            return full_response
-        else:
-            print(f"Error en la solicitud: {response.status_code}")
-            print(f"Respuesta: {response.text}")
-            return None
+        # Solicitud POST a la API, con stream=True para manejar la respuesta por fragmentos;
+        # el with devuelve la conexión al pool aunque se deje de leer al llegar done: true.
+        # El control espera un lugar libre y, al terminar, ajusta la concurrencia con el resultado.
+        # Si la respuesta se corta a mitad del stream, el nodo queda marcado y se reintenta en otro.
+        for intento in range(NODOS):
+            with control.solicitud() as resultado:
+                inicio = time.perf_counter()
+                with cliente.post(payload, headers=headers, stream=True) as response:
+                    # Verificar si la solicitud fue exitosa; los 4xx no son saturación del servidor
+                    if response.status_code != 200:
+                        resultado["exito"] = response.status_code < 500 and response.status_code != 429
+                        logger.error(f"Error en la solicitud: {response.status_code}")
+                        logger.error(f"Respuesta: {response.text}")
+                        metricas.registrar(crear_registro(id_llamada, prompt, time.perf_counter() - inicio, response.status_code,
+                                                          host=urlsplit(response.url).netloc))
+                        return None
+
+                    try:
+                        full_response, estadisticas = leer_respuesta_stream(response, inicio, cliente.timeout_total)
+                    except requests.RequestException as e:
+                        if intento == NODOS - 1:
+                            raise
+                        logger.warning(f"Falló la respuesta de {urlsplit(response.url).netloc} para {descripcion}, "
+                                       f"se reintenta en otro nodo: {e}")
+                        metricas.registrar(crear_registro(id_llamada, prompt, time.perf_counter() - inicio, None,
+                                                          error=str(e), host=urlsplit(response.url).netloc))
+                        continue
+                resultado.update(exito=True, latencia=time.perf_counter() - inicio, estadisticas=estadisticas)
+            break
+
+        metricas.registrar(crear_registro(id_llamada, prompt, time.perf_counter() - inicio, response.status_code, estadisticas,
+                                          host=urlsplit(response.url).netloc))
+
+        logger.debug(f"Estadísticas de Ollama para {descripcion}: {estadisticas}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Respuesta completa recibida:\n{full_response}")
+        # Solo las respuestas completas y con texto se guardan; una cortada o vacía se volverá a pedir
+        if estadisticas.get("done") and full_response.strip():
+            cache.guardar(payload, full_response)
+        return full_response
 
     except requests.RequestException as e:
-        print(f"Error al enviar la noticia: {e}")
+        logger.error(f"Error al enviar la noticia: {e}")
+        metricas.registrar(crear_registro(id_llamada, prompt, time.perf_counter() - inicio, None, error=str(e)))
         return None
 
-# Función para procesar la respuesta del modelo y asignar valores
-def procesar_respuesta(nlp_response):
-    evaluacion = {
-        "preguntas": [],
-        "hechos o evidencias": [],
-        "conclusiones": [],
-        "suposiciones implícitas": [],
-        "palabras clave importantes": [],
-        "palabras clave deducidas": [],
-        "sujetos importantes": [],
-        "lugares físicos": [],
-        "medios de información o sitios web": [],
-        "resumen": ""
-    }
-    
-    # Tokenizar la respuesta
-    tokens = word_tokenize(nlp_response)
-
-    # Eliminar caracteres especiales y stopwords
-    tokens_limpios = [token.lower() for token in tokens if token.isalpha() and len(token) > 2]
-
-    # Lista de posibles encabezados
-    encabezados = [
-        "Preguntas que se plantean en el texto",
-        "Hechos o evidencias que sustentan el texto",
-        "Conclusiones escritas en la noticia",
-        "Suposiciones implícitas",
-        "Palabras clave importantes",
-        "Palabras clave deducidas",
-        "Sujetos importantes mencionados",
-        "Lugares físicos mencionados",
-        "Medios de información o sitios web mencionados",
-        "Resumen",
-        "Análisis de la Noticia"
-    ]
-    
-    for encabezado in encabezados:
-        key = encabezado.lower().replace(" mencionados", "").replace("que se plantean en el texto", "")
-        if key in evaluacion:
-            if isinstance(evaluacion[key], list):
-                evaluacion[key] = extraer_lista_seccion(nlp_response, encabezado)
-            else:
-                evaluacion[key] = extraer_seccion(nlp_response, encabezado)
-    
-    # Si no se encontró un resumen, intenta extraer una conclusión general
-    if not evaluacion["resumen"]:
-        evaluacion["resumen"] = extraer_seccion(nlp_response, "Conclusión") or extraer_seccion(nlp_response, "Análisis de la Noticia")
-    
-    return evaluacion
-
-def extraer_seccion(texto, encabezado):
-    # Busca el encabezado con diferentes formatos posibles
-    patrones = [
-        rf"\*\*{re.escape(encabezado)}:?\*\*:?\s*(.*?)(?=\n\*\*|\Z)",
-        rf"{re.escape(encabezado)}:?\s*(.*?)(?=\n\w+:|\Z)",
-        rf"\d+\.\s*{re.escape(encabezado)}:?\s*(.*?)(?=\n\d+\.|\Z)"
-    ]
-    
-    for patron in patrones:
-        resultado = re.search(patron, texto, re.DOTALL | re.IGNORECASE)
-        if resultado:
-            return resultado.group(1).strip()
-    
-    return "No evaluado"
-
-
-def extraer_lista_seccion(texto, encabezado):
-    seccion = extraer_seccion(texto, encabezado)
-    if seccion != "No evaluado":
-        # Elimina asteriscos, guiones, números y letras al principio de cada línea
-        items = re.findall(r'(?:^|\n)\s*(?:\*|-|\d+\.|[a-z]\)|\(?\d+\)?)\s*(.*?)(?=\n|$)', seccion)
-        # Si no se encontraron items con el patrón anterior, divide por líneas
-        if not items:
-            items = [line.strip() for line in seccion.split('\n') if line.strip()]
-        return [item for item in items if item]
-    return []
-
-# Función para procesar y etiquetar cada noticia
-def procesar_noticias():
-    noticias = leer_noticias()
-    
-    for noticia_actual in noticias:
-        logger.info(f"Procesando noticia: {noticia_actual['titulo']}")
-        
-        try:
-            nlp_response = enviar_a_nlp(noticia_actual)
-            
-            if nlp_response:
-                evaluacion = procesar_respuesta(nlp_response)
-                noticia_actual["evaluacion"] = evaluacion
-                logger.info(f"Noticia procesada exitosamente: {noticia_actual['titulo']}")
-                logger.debug(f"Evaluación: {json.dumps(evaluacion, ensure_ascii=False, indent=2)}")
-            else:
-                logger.warning(f"No se obtuvo respuesta para la noticia: {noticia_actual['titulo']}")
-                noticia_actual["evaluacion"] = generar_evaluacion_vacia()
-        except Exception as e:
-            logger.error(f"Error al procesar la noticia {noticia_actual['titulo']}: {str(e)}", exc_info=True)
-            noticia_actual["evaluacion"] = generar_evaluacion_vacia()
-    
+# Función para interpretar la respuesta con el parser de la estrategia
+def interpretar_respuesta(nlp_response, estrategia, tipo, parciales=None):
+    return estrategia.interpretar(nlp_response, tipo, parciales)
+
+# Función para evaluar una sola noticia; devuelve (evaluación, respuesta del modelo, tipo de la respuesta).
+# Si falla devuelve None como evaluación, sin detener el resto; la respuesta se conserva para reprocesarla.
+def evaluar_noticia(noticia_actual, estrategia):
+    logger.info(f"Procesando noticia: {noticia_actual['titulo']} (versión {estrategia.version})")
+
+    nlp_response, tipo = None, None
+    try:
+        nlp_response, tipo, parciales = enviar_a_nlp(noticia_actual, estrategia)
+
+        if nlp_response:
+            evaluacion = interpretar_respuesta(nlp_response, estrategia, tipo, parciales)
+            logger.info(f"Noticia procesada exitosamente: {noticia_actual['titulo']}")
+            logger.debug(f"Evaluación: {json.dumps(evaluacion, ensure_ascii=False, indent=2)}")
+            return evaluacion, nlp_response, tipo
+        else:
+            logger.warning(f"No se obtuvo respuesta para la noticia: {noticia_actual['titulo']}")
+    except Exception as e:
+        logger.error(f"Error al procesar la noticia {noticia_actual['titulo']}: {str(e)}", exc_info=True)
+    return None, nlp_response, tipo
+
+# Función de la etapa de inferencia: envía el prompt ya preparado de una noticia
+def inferir_noticia(noticia, prompt, estrategia):
+    logger.info(f"Procesando noticia: {noticia['titulo']} (versión {estrategia.version})")
+    return enviar_prompts(noticia, prompt, estrategia)
+
+# Función para evaluar varias noticias cortas con una sola solicitud; el lote es una lista de (noticia, contenido).
+# Devuelve (evaluación o None, respuesta, tipo) por noticia; la respuesta de cada noticia es su objeto JSON del lote.
+# Las que no se pudieron leer del lote se evalúan por separado.
+def evaluar_lote(lote, estrategia):
+    if len(lote) == 1:
+        return [evaluar_noticia(lote[0][0], estrategia)]
+
+    objetos = {}
+    titulos = ", ".join(noticia['titulo'] for noticia, _ in lote)
     try:
-        with open('./clean/noticias_con_evaluacion.json', 'w', encoding='utf-8') as file:
-            json.dump(noticias, file, ensure_ascii=False, indent=4)
-        logger.info("Proceso completado. Archivo guardado como noticias_con_evaluacion.json")
+        prompt = crear_prompt_lote([contenido for _, contenido in lote])
+        if estrategia.formato:
+            system, formato = SYSTEM_PROMPT_LOTE_JSON, ESQUEMA_LOTE
+        else:
+            system, formato = SYSTEM_PROMPT_LOTE, None
+        nlp_response = enviar_prompt(prompt, "lote:" + "|".join(clave_noticia(noticia) for noticia, _ in lote), titulos,
+                                     system, formato)
+        if nlp_response:
+            objetos = extraer_objetos_lote(nlp_response, len(lote))
+    except ValueError as e:
+        logger.warning(f"No se pudo interpretar la respuesta del lote ({titulos}): {e}")
     except Exception as e:
-        logger.error(f"Error al guardar el archivo JSON: {str(e)}", exc_info=True)
+        logger.error(f"Error al procesar el lote ({titulos}): {str(e)}", exc_info=True)
+
+    faltantes = len(lote) - len(objetos)
+    if faltantes:
+        logger.info(f"{faltantes} de {len(lote)} noticias del lote se evaluarán por separado")
+    return [(normalizar_evaluacion(objetos[posicion]), json.dumps(objetos[posicion], ensure_ascii=False), RESPUESTA_LOTE)
+            if posicion in objetos else evaluar_noticia(noticia, estrategia)
+            for posicion, (noticia, _) in enumerate(lote)]
+
+# Función para aplicar el triaje y el orden de prioridad a las noticias pendientes por bloques de
+# BLOQUE_PENDIENTES: solo un bloque está en memoria a la vez y el resultado sigue siendo un generador.
+# El IDF del triaje se calcula sobre todo el almacén y se guarda en él hasta que entren noticias nuevas; la
+# fecha de referencia de la recencia se calcula una vez. Las omitidas de cada bloque se guardan con su motivo.
+def seleccionar_pendientes(almacen, pendientes, filtros, sin_evaluar):
+    frecuencias = triaje.frecuencias_almacen(almacen, filtros) if triaje else None
+    referencia = leer_fecha(almacen.fecha_mas_reciente(sin_evaluar=sin_evaluar, **filtros)) if planificador else None
+    vistos = set()
+    while True:
+        bloque = list(islice(pendientes, BLOQUE_PENDIENTES))
+        if not bloque:
+            return
+        if triaje:
+            revisadas = bloque
+            bloque, omitidas = triaje.filtrar(bloque, frecuencias=frecuencias, vistos=vistos)
+            almacen.guardar_omitidas(revisadas, omitidas, *sin_evaluar)
+            for noticia, motivo in omitidas:
+                logger.debug(f"Omitida ({motivo}): {noticia['titulo']}")
+            logger.info(f"Triaje: {len(omitidas)} noticias omitidas, {len(bloque)} se envían al modelo")
+        if planificador:
+            bloque = planificador.ordenar(bloque, referencia)
+        yield from bloque
+
+# Función para evaluar con una estrategia las noticias del almacén que aún no tienen su evaluación
+def evaluar_version(almacen, estrategia, max_concurrencia, filtros):
+    sin_evaluar = (estrategia.version, MODELO)
+    logger.info(f"Evaluando las noticias pendientes con la versión {estrategia.version} y {MODELO}")
+    pendientes = almacen.iterar_noticias(sin_evaluar=sin_evaluar, **filtros)
+    if triaje or planificador:
+        pendientes = seleccionar_pendientes(almacen, pendientes, filtros, sin_evaluar)
+
+    # El modo por lotes agrupa todas las pendientes a la vez; en el modo por etapas pasan del almacén a las
+    # colas acotadas como generador y la memoria no crece con el corpus
+    modo_lotes = MODO_LOTES and estrategia.lotes
+    if modo_lotes:
+        pendientes = list(pendientes)
+        logger.info(f"{len(pendientes)} noticias pendientes de evaluar con la versión {estrategia.version} y {MODELO}")
+
+    # Cada evaluación se guarda en el almacén en cuanto llega, junto con la respuesta cruda del modelo para
+    # poder reprocesarla con otro parser; las fallidas se reintentan en la próxima ejecución
+    evaluadas = [0]
+
+    def registrar(indice, resultado, noticia):
+        evaluacion, respuesta, tipo = resultado
+        if respuesta:
+            almacen.guardar_respuesta(noticia, respuesta, estrategia.version, MODELO, tipo)
+        if evaluacion is not None:
+            almacen.guardar_evaluacion(noticia, evaluacion, estrategia.version, MODELO)
+            evaluadas[0] += 1
+
+    if modo_lotes:
+        # Agrupar las noticias cortas; cada lote vuelve con una evaluación por noticia
+        contenidos = [preparar_contenido(noticia) for noticia in pendientes]
+        if MODO_FRAGMENTOS:
+            # Con el texto completo, las noticias largas superan el límite de las cortas y van solas,
+            # evaluadas por fragmentos
+            contenidos = [texto if estimar_tokens(texto) > OPCIONES_FRAGMENTOS["umbral_fragmentos"] else contenido
+                          for texto, contenido in zip(map(texto_noticia, pendientes), contenidos)]
+        indices_lotes = agrupar_en_lotes(contenidos, PRESUPUESTO_LOTE, MAX_NOTICIAS_LOTE)
+        logger.info(f"{len(pendientes)} noticias agrupadas en {len(indices_lotes)} solicitudes")
+
+        def registrar_lote(indice_lote, resultados_lote, lote):
+            for indice, resultado, (noticia, _) in zip(indices_lotes[indice_lote], resultados_lote, lote):
+                registrar(indice, resultado, noticia)
+
+        lotes = [[(pendientes[indice], contenidos[indice]) for indice in indices] for indices in indices_lotes]
+        _, estadisticas = evaluar_en_paralelo(lotes, lambda lote: evaluar_lote(lote, estrategia), max_concurrencia,
+                                              al_completar=registrar_lote)
+    else:
+        # Preparar el prompt e interpretar la respuesta en otros procesos mientras los hilos esperan al modelo
+        _, estadisticas = evaluar_en_etapas(pendientes, partial(preparar_prompt, estrategia.version, PRESUPUESTO_TOKENS,
+                                                                **OPCIONES_FRAGMENTOS),
+                                            lambda noticia, prompt: inferir_noticia(noticia, prompt, estrategia),
+                                            partial(interpretar_version, estrategia.version), max_concurrencia,
+                                            al_completar=registrar, procesos=PROCESOS_ETAPAS, tamano_cola=TAMANO_COLA)
+    # En el modo por lotes las estadísticas cuentan solicitudes; "evaluadas" son las noticias con evaluación
+    estadisticas["evaluadas"] = evaluadas[0]
+    return estadisticas
+
+
+# Función para obtener el archivo de exportación de una versión: la principal de la ejecución conserva
+# el nombre de siempre, las demás llevan su versión para compararlas
+def ruta_exportacion(version, principal):
+    if version == principal:
+        return './clean/noticias_con_evaluacion.json'
+    return f'./clean/noticias_con_evaluacion_v{version}.json'
+
+
+# Función para evaluar las noticias del almacén con cada versión de VERSIONES.
+# `filtros` (fuente, desde, hasta) limitan la ejecución a una parte del corpus.
+def procesar_noticias(max_concurrencia=MAX_CONCURRENCIA, versiones=None, **filtros):
+    estrategias = [obtener_estrategia(version) for version in versiones or VERSIONES]
+    almacen = crear_almacen(ruta_noticias=noticias_file_path, ruta_diario=diario_file_path, requiere_noticias=True)
+    estadisticas = {}
+
+    try:
+        for estrategia in estrategias:
+            estadisticas[estrategia.version] = evaluar_version(almacen, estrategia, max_concurrencia, filtros)
 
+        logger.info(f"Caché de respuestas: {cache.estadisticas()}")
+        logger.info(f"Control de concurrencia: {control.resumen()}")
+        if triaje:
+            logger.info(f"Triaje: {triaje.resumen()}")
+        if NODOS > 1:
+            logger.info(f"Servidores de Ollama: {cliente.resumen()}")
+        metricas.guardar_resumen(triaje=triaje.resumen() if triaje else None)
 
-def generar_evaluacion_vacia():
-    return {
-        "preguntas": [],
-        "hechos o evidencias": [],
-        "conclusiones": [],
-        "suposiciones implícitas": [],
-        "palabras clave importantes": [],
-        "palabras clave deducidas": [],
-        "sujetos importantes": [],
-        "lugares físicos": [],
-        "medios de información o sitios web": [],
-        "resumen": "No evaluado"
-    }
+        # Exportación para compatibilidad con los scripts que leen noticias_con_evaluacion.json
+        for estrategia in estrategias:
+            ruta = ruta_exportacion(estrategia.version, estrategias[0].version)
+            try:
+                almacen.exportar_json(ruta, estrategia.version, MODELO, **filtros)
+                logger.info(f"Proceso completado. Archivo guardado como {os.path.basename(ruta)}")
+            except Exception as e:
+                logger.error(f"Error al guardar el archivo JSON: {str(e)}", exc_info=True)
+    finally:
+        almacen.cerrar()
+    return estadisticas
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-    logger = logging.getLogger()
     
     procesar_noticias()
\ No newline at end of file
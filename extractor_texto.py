@@ -0,0 +1,181 @@
+import os
+from html.parser import HTMLParser
+
+# Backends opcionales, más rápidos que html.parser; si no están instalados se usa el parser de la biblioteca estándar
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# Etiquetas que separan párrafos y etiquetas cuyo contenido no es texto de la noticia
+ETIQUETAS_BLOQUE = {"p", "div", "br", "li", "blockquote", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "section", "article"}
+ETIQUETAS_IGNORADAS = {"script", "style", "noscript", "iframe", "svg", "figure", "figcaption", "form", "button"}
+
+TAMANO_BLOQUE_HTML = 8192
+
+
+# Función para juntar los fragmentos de un párrafo y normalizar espacios
+def _unir(fragmentos):
+    return " ".join("".join(fragmentos).split())
+
+
+# Parser en streaming que junta el texto por párrafos sin construir un árbol
+class ExtractorParrafos(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parrafos = []
+        self.caracteres = 0
+        self._actual = []
+        self._ignorar = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ETIQUETAS_IGNORADAS:
+            self._ignorar += 1
+        elif tag in ETIQUETAS_BLOQUE:
+            self._cerrar_parrafo()
+
+    def handle_endtag(self, tag):
+        if tag in ETIQUETAS_IGNORADAS:
+            self._ignorar = max(0, self._ignorar - 1)
+        elif tag in ETIQUETAS_BLOQUE:
+            self._cerrar_parrafo()
+
+    def handle_data(self, data):
+        if not self._ignorar:
+            self._actual.append(data)
+
+    def _cerrar_parrafo(self):
+        texto = _unir(self._actual)
+        self._actual = []
+        if texto:
+            self.parrafos.append(texto)
+            self.caracteres += len(texto)
+
+    def close(self):
+        super().close()
+        self._cerrar_parrafo()
+
+
+# Backend html.parser: parsea por bloques y se detiene al reunir `limite_caracteres`
+def _parrafos_htmlparser(html, limite_caracteres):
+    extractor = ExtractorParrafos()
+    for inicio in range(0, len(html), TAMANO_BLOQUE_HTML):
+        extractor.feed(html[inicio:inicio + TAMANO_BLOQUE_HTML])
+        if limite_caracteres is not None and extractor.caracteres >= limite_caracteres:
+            break
+    extractor.close()
+    return extractor.parrafos
+
+
+# Backend selectolax (lexbor): parsea en C y recorre los nodos de texto cortando en cada bloque
+def _parrafos_selectolax(html, limite_caracteres):
+    arbol = LexborHTMLParser(html)
+    arbol.strip_tags(list(ETIQUETAS_IGNORADAS))
+    raiz = arbol.body
+    if raiz is None:
+        return []
+
+    parrafos = []
+    actual = []
+    caracteres = 0
+    for nodo in raiz.traverse(include_text=True):
+        if nodo.tag == '-text':
+            actual.append(nodo.text_content)
+        elif nodo.tag in ETIQUETAS_BLOQUE:
+            texto = _unir(actual)
+            actual = []
+            if texto:
+                parrafos.append(texto)
+                caracteres += len(texto)
+                if limite_caracteres is not None and caracteres >= limite_caracteres:
+                    return parrafos
+    texto = _unir(actual)
+    if texto:
+        parrafos.append(texto)
+    return parrafos
+
+
+# Backend lxml: parsea en C y recorre el árbol con eventos de apertura y cierre
+def _parrafos_lxml(html, limite_caracteres):
+    try:
+        raiz = lxml_html.fragment_fromstring(html, create_parent='div')
+    except (etree.ParserError, ValueError):
+        return []
+    etree.strip_elements(raiz, *ETIQUETAS_IGNORADAS, with_tail=False)
+
+    parrafos = []
+    actual = []
+    caracteres = 0
+
+    def cerrar():
+        nonlocal actual, caracteres
+        texto = _unir(actual)
+        actual = []
+        if texto:
+            parrafos.append(texto)
+            caracteres += len(texto)
+
+    for evento, elemento in etree.iterwalk(raiz, events=('start', 'end')):
+        etiqueta = elemento.tag if isinstance(elemento.tag, str) else ''
+        if evento == 'start':
+            if etiqueta in ETIQUETAS_BLOQUE:
+                cerrar()
+            if elemento.text and etiqueta:
+                actual.append(elemento.text)
+        else:
+            if etiqueta in ETIQUETAS_BLOQUE:
+                cerrar()
+            if elemento.tail and elemento is not raiz:
+                actual.append(elemento.tail)
+        if limite_caracteres is not None and caracteres >= limite_caracteres:
+            return parrafos
+    cerrar()
+    return parrafos
+
+
+BACKENDS = {"htmlparser": _parrafos_htmlparser}
+if LexborHTMLParser is not None:
+    BACKENDS["selectolax"] = _parrafos_selectolax
+if lxml_html is not None:
+    BACKENDS["lxml"] = _parrafos_lxml
+
+
+# Función para elegir el backend: EXTRACTOR_HTML fuerza uno; si no, el más rápido disponible
+def elegir_backend(nombre=None):
+    nombre = nombre or os.getenv('EXTRACTOR_HTML', 'auto')
+    if nombre == 'auto':
+        for candidato in ("selectolax", "lxml", "htmlparser"):
+            if candidato in BACKENDS:
+                return candidato
+    if nombre not in BACKENDS:
+        raise ValueError(f"Extractor HTML no disponible: {nombre} (disponibles: {', '.join(BACKENDS)})")
+    return nombre
+
+
+BACKEND = elegir_backend()
+
+
+# Función para obtener los párrafos de texto de un HTML; se detiene al reunir `limite_caracteres` si se indica
+def extraer_parrafos(html, limite_caracteres=None, backend=None):
+    if not html:
+        return []
+    return BACKENDS[backend or BACKEND](html, limite_caracteres)
+
+
+# Función para convertir el HTML de una noticia en texto plano, un párrafo por línea
+def extraer_texto(html, backend=None):
+    return "\n".join(extraer_parrafos(html, backend=backend))
+
+
+# Función para obtener el texto plano de una noticia normalizada (las de antes de la versión 3 no traen "texto")
+def texto_noticia(noticia):
+    texto = noticia.get("texto")
+    if texto is None:
+        texto = extraer_texto(noticia.get("contenido") or "")
+    return texto.strip()
@@ -0,0 +1,132 @@
+import json
+import logging
+import math
+import re
+import unicodedata
+
+from presupuesto_contenido import estimar_tokens
+from salida_json import CAMPOS_EVALUACION
+
+logger = logging.getLogger(__name__)
+
+# Tipo de la respuesta guardada de una noticia evaluada por fragmentos: un paquete JSON con las respuestas
+# de todos sus fragmentos, que el reprocesamiento vuelve a combinar
+RESPUESTA_FRAGMENTOS = "fragmentos"
+
+_RE_SIGNOS_EXTREMOS = re.compile(r'^[\W_]+|[\W_]+$')
+
+
+# Función para dividir un párrafo demasiado largo en trozos de palabras que quepan en el presupuesto
+def _partir_parrafo(parrafo, tokens_fragmento):
+    trozos = []
+    actual = []
+    usados = 0
+    for palabra in parrafo.split():
+        costo = estimar_tokens(palabra)
+        if actual and usados + costo > tokens_fragmento:
+            trozos.append(" ".join(actual))
+            actual = []
+            usados = 0
+        actual.append(palabra)
+        usados += costo
+    if actual:
+        trozos.append(" ".join(actual))
+    return trozos
+
+
+# Función para agrupar los párrafos del texto (uno por línea) en fragmentos de hasta `tokens_fragmento`
+# tokens sin cortar párrafos, salvo los que por sí solos no caben
+def _agrupar_parrafos(texto, tokens_fragmento):
+    fragmentos = []
+    actual = []
+    usados = 0
+    for parrafo in (parrafo for parrafo in texto.split("\n") if parrafo.strip()):
+        costo = estimar_tokens(parrafo)
+        piezas = [parrafo] if costo <= tokens_fragmento else _partir_parrafo(parrafo, tokens_fragmento)
+        for pieza in piezas:
+            costo = estimar_tokens(pieza)
+            if actual and usados + costo > tokens_fragmento:
+                fragmentos.append("\n".join(actual))
+                actual = []
+                usados = 0
+            actual.append(pieza)
+            usados += costo
+    if actual:
+        fragmentos.append("\n".join(actual))
+    return fragmentos
+
+
+# Función para dividir el texto de una noticia en fragmentos de hasta `tokens_fragmento` tokens.
+# Si hacen falta más de `max_fragmentos`, los fragmentos se agrandan hasta que todo el texto quepa en
+# `max_fragmentos`: nunca se descarta el final del artículo.
+def dividir_en_fragmentos(texto, tokens_fragmento=1000, max_fragmentos=8):
+    fragmentos = _agrupar_parrafos(texto, tokens_fragmento)
+    if not max_fragmentos or len(fragmentos) <= max_fragmentos:
+        return fragmentos
+    tamano = max(tokens_fragmento, math.ceil(estimar_tokens(texto) / max_fragmentos))
+    while len(fragmentos) > max_fragmentos:
+        fragmentos = _agrupar_parrafos(texto, tamano)
+        tamano = math.ceil(tamano * 1.1)
+    logger.info(f"Texto de {estimar_tokens(texto)} tokens dividido en {len(fragmentos)} fragmentos "
+                f"de más de {tokens_fragmento} tokens para no descartar el final")
+    return fragmentos
+
+
+# Clave para detectar repetidos: sin signos alrededor, mayúsculas ni acentos
+def _clave_elemento(elemento):
+    sin_acentos = "".join(caracter for caracter in unicodedata.normalize('NFKD', elemento.casefold())
+                          if not unicodedata.combining(caracter))
+    return " ".join(_RE_SIGNOS_EXTREMOS.sub('', sin_acentos).split())
+
+
+# Función para combinar las evaluaciones de los fragmentos: las listas se unen en orden sin repetir
+# elementos (sin distinguir mayúsculas, acentos ni signos alrededor) y los resúmenes se juntan, salvo que se
+# pase el `resumen` escrito a partir de todos ellos
+def combinar_evaluaciones(evaluaciones, resumen=None):
+    combinada = {}
+    for campo, tipo in CAMPOS_EVALUACION.items():
+        if tipo is list:
+            elementos = []
+            vistos = set()
+            for evaluacion in evaluaciones:
+                for elemento in evaluacion.get(campo) or []:
+                    clave = _clave_elemento(elemento)
+                    if clave and clave not in vistos:
+                        vistos.add(clave)
+                        elementos.append(elemento)
+            combinada[campo] = elementos
+        else:
+            textos = [evaluacion.get(campo) for evaluacion in evaluaciones
+                      if evaluacion.get(campo) and evaluacion.get(campo) != "No evaluado"]
+            combinada[campo] = " ".join(textos) if textos else "No evaluado"
+    if resumen:
+        combinada["resumen"] = resumen
+    return combinada
+
+
+# Función para guardar juntas las respuestas de los fragmentos (y el resumen de la reducción, si lo hubo)
+def empaquetar_respuestas(respuestas, resumen=None):
+    paquete = {"fragmentos": respuestas}
+    if resumen:
+        paquete["resumen"] = resumen
+    return json.dumps(paquete, ensure_ascii=False)
+
+
+# Función para interpretar un paquete con el parser de la estrategia, fragmento por fragmento; con
+# `parciales` (las evaluaciones de los fragmentos ya interpretadas) solo se combinan
+def procesar_paquete(procesar, respuesta, parciales=None):
+    paquete = json.loads(respuesta)
+    if parciales is None:
+        parciales = [procesar(parte) for parte in paquete["fragmentos"]]
+    return combinar_evaluaciones(parciales, paquete.get("resumen"))
+
+
+# Instrucciones de la reducción: una llamada corta que solo escribe el resumen a partir de los parciales
+SYSTEM_PROMPT_REDUCCION = (
+    "Recibirás los resúmenes de las partes de una misma noticia, en orden. "
+    "Escribe un único resumen de la noticia completa en un párrafo, sin listas ni encabezados."
+)
+
+
+def crear_prompt_reduccion(resumenes):
+    return "\n".join(f"Parte {numero}: {resumen}" for numero, resumen in enumerate(resumenes, 1))
@@ -0,0 +1,107 @@
+import json
+import re
+
+from presupuesto_contenido import estimar_tokens
+from salida_json import CAMPOS_EVALUACION, normalizar_evaluacion
+
+# Tipo de la respuesta guardada de una noticia evaluada en un lote: su objeto JSON del lote, que el
+# reprocesamiento lee como JSON sea cual sea el parser de la estrategia
+RESPUESTA_LOTE = "lote"
+
+# Función para agrupar noticias cortas en lotes que quepan en el presupuesto de tokens.
+# Recibe los contenidos ya preparados y devuelve listas de índices; las noticias largas van solas.
+def agrupar_en_lotes(contenidos, presupuesto_tokens=2000, max_por_lote=8, limite_corto=400):
+    lotes = []
+    actual = []
+    tokens_actual = 0
+    for indice, contenido in enumerate(contenidos):
+        tokens = estimar_tokens(contenido)
+        if tokens > limite_corto:
+            lotes.append([indice])
+            continue
+        if actual and (tokens_actual + tokens > presupuesto_tokens or len(actual) >= max_por_lote):
+            lotes.append(actual)
+            actual = []
+            tokens_actual = 0
+        actual.append(indice)
+        tokens_actual += tokens
+    if actual:
+        lotes.append(actual)
+    return lotes
+
+
+# Función para armar las instrucciones fijas del modo por lotes; se envían como `system` para que sean
+# un prefijo estable. Con el parámetro `format` (ESQUEMA_LOTE) Ollama obliga a un objeto
+# {"noticias": [...]}, así que las instrucciones deben pedir ese objeto y no un arreglo suelto.
+def _instrucciones_lote(forma_respuesta):
+    return (
+        "Este es un análisis de noticias. El usuario envía varias noticias marcadas como [Noticia n]; "
+        "analiza cada una por separado.\n"
+        f"Responde únicamente con {forma_respuesta} en el mismo orden, de la forma "
+        "{\"id\": número de la noticia, "
+        + ", ".join(
+            f'"{campo}": {"[lista de textos]" if tipo is list else "texto"}'
+            for campo, tipo in CAMPOS_EVALUACION.items()
+        )
+        + "}.\n"
+        "Los campos son: preguntas que se plantean en el texto, hechos o evidencias que sustentan el texto, "
+        "conclusiones escritas en la noticia, suposiciones implícitas, palabras clave importantes, "
+        "palabras clave deducidas, sujetos importantes mencionados, lugares físicos mencionados, "
+        "medios de información o sitios web mencionados y un resumen breve.\n"
+    )
+
+
+SYSTEM_PROMPT_LOTE = _instrucciones_lote("un arreglo JSON con un objeto por noticia")
+SYSTEM_PROMPT_LOTE_JSON = _instrucciones_lote(
+    "un objeto JSON {\"noticias\": [...]} cuyo arreglo tiene un objeto por noticia")
+
+
+# Función para crear el prompt de un lote: solo las noticias, numeradas, al final de la solicitud
+def crear_prompt_lote(contenidos):
+    noticias = "\n\n".join(
+        f"[Noticia {numero}]\n{contenido}" for numero, contenido in enumerate(contenidos, start=1)
+    )
+    return f"Analiza cada una de las siguientes {len(contenidos)} noticias por separado.\n\n{noticias}\n"
+
+
+# Función para leer el arreglo de objetos de la respuesta de un lote: el primer valor JSON que empiece en un
+# `[` o `{` y sea un arreglo o un objeto {"noticias": [...]} (modo JSON). Decodifica solo ese valor, así que
+# el texto que el modelo agregue antes o después, aunque tenga corchetes, no lo invalida.
+def _leer_arreglo_lote(respuesta):
+    decodificador = json.JSONDecoder()
+    error = None
+    for inicio in re.finditer(r'[\[{]', respuesta):
+        try:
+            valor, _ = decodificador.raw_decode(respuesta, inicio.start())
+        except json.JSONDecodeError as e:
+            error = error or e
+            continue
+        if isinstance(valor, dict):
+            valor = valor.get("noticias")
+        if isinstance(valor, list):
+            return valor
+    if error:
+        raise ValueError(f"Arreglo JSON inválido en la respuesta del lote: {error}")
+    raise ValueError("La respuesta del lote no contiene un arreglo JSON")
+
+
+# Función para leer los objetos de la respuesta de un lote como {posición en el lote: objeto JSON}.
+# Lanza ValueError si la respuesta no contiene un arreglo JSON válido.
+def extraer_objetos_lote(respuesta, cantidad):
+    objetos = _leer_arreglo_lote(respuesta)
+
+    por_posicion = {}
+    for posicion, objeto in enumerate(objetos):
+        if not isinstance(objeto, dict):
+            continue
+        numero = objeto.get("id")
+        # Si el modelo omitió el id, se usa el orden del arreglo
+        indice = int(numero) - 1 if isinstance(numero, (int, str)) and str(numero).isdigit() else posicion
+        if 0 <= indice < cantidad and indice not in por_posicion:
+            por_posicion[indice] = objeto
+    return por_posicion
+
+
+# Función para interpretar la respuesta guardada de una noticia evaluada en un lote
+def procesar_respuesta_lote(respuesta):
+    return normalizar_evaluacion(json.loads(respuesta))
@@ -0,0 +1,206 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+
+# Función para calcular un percentil sobre una lista ya ordenada
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    posicion = (len(valores_ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    fraccion = posicion - inferior
+    return valores_ordenados[inferior] + (valores_ordenados[superior] - valores_ordenados[inferior]) * fraccion
+
+
+# Función que ejecuta la evaluación de una noticia y mide cuánto tardó
+def _evaluar_con_latencia(evaluar, noticia):
+    inicio = time.perf_counter()
+    resultado = evaluar(noticia)
+    return resultado, time.perf_counter() - inicio
+
+
+# Función para evaluar noticias con varias solicitudes en vuelo al mismo tiempo.
+# Devuelve un diccionario {índice de la noticia: resultado} y las estadísticas de la ejecución.
+# `al_completar(indice, resultado, noticia)` recibe cada resultado en cuanto llega.
+def evaluar_en_paralelo(noticias, evaluar, max_concurrencia=4, al_completar=None):
+    resultados = {}
+    latencias = []
+    inicio = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrencia)) as executor:
+        futuros = {
+            executor.submit(_evaluar_con_latencia, evaluar, noticia): (indice, noticia)
+            for indice, noticia in enumerate(noticias)
+        }
+        for futuro in as_completed(futuros):
+            indice, noticia = futuros[futuro]
+            resultado, latencia = futuro.result()
+            resultados[indice] = resultado
+            latencias.append(latencia)
+            logger.info(f"Noticia {indice + 1}/{len(noticias)} evaluada en {latencia:.2f} s")
+            if al_completar:
+                al_completar(indice, resultado, noticia)
+
+    estadisticas = calcular_estadisticas(latencias, time.perf_counter() - inicio, max_concurrencia)
+    registrar_estadisticas(estadisticas)
+    return resultados, estadisticas
+
+
+# Función que ejecuta una etapa de CPU y mide cuánto tardó; en el proceso de trabajo si hay uno
+def _ejecutar_medido(funcion, *argumentos):
+    inicio = time.perf_counter()
+    resultado = funcion(*argumentos)
+    return resultado, time.perf_counter() - inicio
+
+
+_FIN = None
+
+
+# Función para evaluar noticias en tres etapas que se solapan, unidas por colas acotadas:
+# `preparar(noticia)` (CPU) construye el trabajo, `inferir(noticia, trabajo)` (E/S) consulta al modelo
+# desde `max_concurrencia` hilos e `interpretar(respuesta)` (CPU) produce el resultado. Con `procesos`
+# las etapas de CPU corren en un ProcessPoolExecutor y no compiten por el GIL con los hilos de inferencia;
+# sin él corren en el hilo productor y en los de inferencia. Las colas de `tamano_cola` elementos frenan
+# la lectura de `noticias` (que puede ser un generador) cuando la inferencia no da abasto, así que la
+# memoria no crece con el corpus. Con `al_completar(indice, resultado, noticia)` los resultados no se
+# acumulan en el diccionario y quien llama no necesita conservar las noticias para saber a cuál pertenecen.
+def evaluar_en_etapas(noticias, preparar, inferir, interpretar, max_concurrencia=4, al_completar=None,
+                      procesos=None, tamano_cola=None):
+    hilos = max(1, max_concurrencia)
+    tamano_cola = tamano_cola or 2 * hilos
+    trabajos = queue.Queue(maxsize=tamano_cola)
+    respuestas = queue.Queue(maxsize=tamano_cola)
+    detener = threading.Event()
+    error_lectura = []
+    tiempos = {"preparacion_s": 0.0, "inferencia_s": 0.0, "interpretacion_s": 0.0}
+    lock = threading.Lock()
+
+    ejecutor_cpu = ProcessPoolExecutor(max_workers=procesos) if procesos else None
+    if ejecutor_cpu:
+        # Crear los procesos antes de lanzar los hilos: con fork no deben copiar un lock tomado por otro hilo
+        ejecutor_cpu.submit(int).result()
+
+    def en_cpu(funcion, *argumentos):
+        if ejecutor_cpu:
+            return ejecutor_cpu.submit(_ejecutar_medido, funcion, *argumentos)
+        futuro = Future()
+        try:
+            futuro.set_result(_ejecutar_medido(funcion, *argumentos))
+        except Exception as e:
+            futuro.set_exception(e)
+        return futuro
+
+    def sumar_tiempo(etapa, segundos):
+        with lock:
+            tiempos[etapa] += segundos
+
+    def producir():
+        try:
+            for indice, noticia in enumerate(noticias):
+                if detener.is_set():
+                    break
+                trabajos.put((indice, noticia, en_cpu(preparar, noticia)))
+        except Exception as e:
+            error_lectura.append(e)
+        finally:
+            for _ in range(hilos):
+                trabajos.put(_FIN)
+
+    def consumir():
+        while True:
+            elemento = trabajos.get()
+            if elemento is _FIN:
+                respuestas.put(_FIN)
+                return
+            indice, noticia, preparado = elemento
+            inicio = time.perf_counter()
+            try:
+                trabajo, duracion = preparado.result()
+                sumar_tiempo("preparacion_s", duracion)
+                inicio_inferencia = time.perf_counter()
+                respuesta = inferir(noticia, trabajo)
+                sumar_tiempo("inferencia_s", time.perf_counter() - inicio_inferencia)
+                interpretado = en_cpu(interpretar, respuesta)
+            except Exception as e:
+                logger.error(f"Error en la noticia {indice + 1}: {str(e)}", exc_info=True)
+                continue
+            respuestas.put((indice, noticia, interpretado, inicio))
+
+    resultados = {}
+    latencias = []
+    inicio = time.perf_counter()
+    productor = threading.Thread(target=producir, daemon=True)
+    consumidores = [threading.Thread(target=consumir, daemon=True) for _ in range(hilos)]
+    try:
+        productor.start()
+        for consumidor in consumidores:
+            consumidor.start()
+
+        terminados = 0
+        while terminados < hilos:
+            elemento = respuestas.get()
+            if elemento is _FIN:
+                terminados += 1
+                continue
+            indice, noticia, interpretado, inicio_noticia = elemento
+            try:
+                resultado, duracion = interpretado.result()
+            except Exception as e:
+                logger.error(f"Error al interpretar la noticia {indice + 1}: {str(e)}", exc_info=True)
+                continue
+            sumar_tiempo("interpretacion_s", duracion)
+            latencia = time.perf_counter() - inicio_noticia
+            latencias.append(latencia)
+            logger.info(f"Noticia {indice + 1} evaluada en {latencia:.2f} s")
+            if al_completar:
+                al_completar(indice, resultado, noticia)
+            else:
+                resultados[indice] = resultado
+    finally:
+        detener.set()
+        if ejecutor_cpu:
+            ejecutor_cpu.shutdown(cancel_futures=True)
+    if error_lectura:
+        raise error_lectura[0]
+
+    estadisticas = calcular_estadisticas(latencias, time.perf_counter() - inicio, max_concurrencia)
+    estadisticas.update({etapa: round(segundos, 3) for etapa, segundos in tiempos.items()})
+    registrar_estadisticas(estadisticas)
+    logger.info(
+        f"Tiempo acumulado por etapa: preparación {estadisticas['preparacion_s']} s, "
+        f"inferencia {estadisticas['inferencia_s']} s, interpretación {estadisticas['interpretacion_s']} s"
+    )
+    return resultados, estadisticas
+
+
+# Función para resumir latencias por noticia y rendimiento total de la ejecución
+def calcular_estadisticas(latencias, duracion_total, max_concurrencia):
+    ordenadas = sorted(latencias)
+    return {
+        "noticias": len(ordenadas),
+        "concurrencia": max_concurrencia,
+        "duracion_total_s": round(duracion_total, 3),
+        "noticias_por_segundo": round(len(ordenadas) / duracion_total, 3) if duracion_total > 0 else 0.0,
+        "latencia_media_s": round(sum(ordenadas) / len(ordenadas), 3) if ordenadas else 0.0,
+        "latencia_p50_s": round(percentil(ordenadas, 50), 3),
+        "latencia_p95_s": round(percentil(ordenadas, 95), 3),
+        "latencia_max_s": round(ordenadas[-1], 3) if ordenadas else 0.0,
+    }
+
+
+# Función para mostrar el resumen de la ejecución en el log
+def registrar_estadisticas(estadisticas):
+    logger.info(
+        f"Evaluadas {estadisticas['noticias']} noticias en {estadisticas['duracion_total_s']} s "
+        f"con concurrencia {estadisticas['concurrencia']}: "
+        f"{estadisticas['noticias_por_segundo']} noticias/s, "
+        f"latencia media {estadisticas['latencia_media_s']} s, "
+        f"p50 {estadisticas['latencia_p50_s']} s, p95 {estadisticas['latencia_p95_s']} s, "
+        f"máx {estadisticas['latencia_max_s']} s"
+    )
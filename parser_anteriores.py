@@ -0,0 +1,97 @@
+import re
+
+# Parsers de las primeras versiones de la evaluación (evaluacion.py a evaluacion0.3.py), registrados en
+# estrategias.py para reprocesar sus respuestas guardadas y comparar sus resultados con los actuales.
+# Conservan el formato de evaluación de cada versión.
+
+
+# Función para extraer el valor que sigue a una etiqueta hasta el fin de la línea
+def extraer_valor(etiqueta, texto):
+    try:
+        inicio = texto.lower().index(etiqueta.lower()) + len(etiqueta) + 1
+        fin = texto.index("\n", inicio)
+        return texto[inicio:fin].strip()
+    except ValueError:
+        return "No evaluado"
+
+
+# Función para extraer una lista separada por comas que sigue a una etiqueta
+def extraer_valor_lista(etiqueta, texto):
+    try:
+        inicio = texto.lower().index(etiqueta.lower()) + len(etiqueta) + 1
+        fin = texto.index("\n", inicio)
+        return [palabra.strip() for palabra in texto[inicio:fin].split(',')]
+    except ValueError:
+        return []
+
+
+# Función para extraer una sección con el formato **Encabezado**: hasta el siguiente encabezado
+def extraer_seccion(encabezado, texto):
+    resultado = re.search(rf"\*\*{encabezado}\*\*:\s*(.*?)(?=\n\*\*|$)", texto, re.DOTALL)
+    if resultado:
+        return resultado.group(1).strip()
+    return "No evaluado"
+
+
+# Función para extraer una sección cuyos elementos van uno por línea
+def extraer_lista_seccion(encabezado, texto):
+    seccion = extraer_seccion(encabezado, texto)
+    if seccion != "No evaluado":
+        return [palabra.strip() for palabra in seccion.split('\n') if palabra.strip()]
+    return []
+
+
+# Parser de evaluacion0.1.py: seis etiquetas de una palabra; las que no aparecen quedan con su valor por defecto
+def procesar_respuesta_01(respuesta):
+    evaluacion = {
+        "orientacion_politica": "Desconocida",
+        "sentimiento": "Neutral",
+        "estado_pais": "No disponible",
+        "agresividad": "Baja",
+        "violencia": "No",
+        "controversia": "No"
+    }
+    etiquetas = {
+        "orientacion_politica": "orientación política",
+        "sentimiento": "sentimiento",
+        "estado_pais": "estado o país mencionado",
+        "agresividad": "nivel de agresividad",
+        "violencia": "violencia",
+        "controversia": "controversia"
+    }
+    for clave, etiqueta in etiquetas.items():
+        if etiqueta in respuesta.lower():
+            evaluacion[clave] = extraer_valor(etiqueta, respuesta)
+    return evaluacion
+
+
+# Parser de evaluacion0.2.py: las seis etiquetas y las categorías del modelo Questions/Evidences/Conclusions
+def procesar_respuesta_02(respuesta):
+    evaluacion = {
+        "orientacion_politica": extraer_valor("orientación política", respuesta),
+        "sentimiento": extraer_valor("sentimiento", respuesta),
+        "estado_pais": extraer_valor("estado o país mencionado", respuesta),
+        "agresividad": extraer_valor("nivel de agresividad", respuesta),
+        "violencia": extraer_valor("violencia", respuesta),
+        "controversia": extraer_valor("controversia", respuesta)
+    }
+    for clave in ("questions", "evidences", "conclusions", "hiddenConclusions"):
+        evaluacion[clave] = extraer_valor(clave, respuesta)
+    for clave in ("keyWords", "deductedKeyWords", "subjects", "landPlaces", "virtualPlaces"):
+        evaluacion[clave] = extraer_valor_lista(clave, respuesta)
+    return evaluacion
+
+
+# Parser de evaluacion0.3.py: solo las categorías Questions/Evidences/Conclusions, como secciones **Encabezado**:
+def procesar_respuesta_03(respuesta):
+    return {
+        "questions": extraer_seccion("Questions", respuesta),
+        "evidences": extraer_seccion("Evidences", respuesta),
+        "conclusions": extraer_seccion("Conclusions", respuesta),
+        "hiddenConclusions": extraer_seccion("HiddenConclusions", respuesta),
+        "keyWords": extraer_lista_seccion("KeyWords", respuesta),
+        "deductedKeyWords": extraer_lista_seccion("DeductedKeyWords", respuesta),
+        "subjects": extraer_lista_seccion("Subjects", respuesta),
+        "landPlaces": extraer_lista_seccion("LandPlaces", respuesta),
+        "virtualPlaces": extraer_lista_seccion("VirtualPlaces", respuesta)
+    }
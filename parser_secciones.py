@@ -0,0 +1,97 @@
+import re
+
+# Sinónimos de cada encabezado que usa el modelo en sus respuestas de texto, por clave de la evaluación.
+# "Conclusión" y "Análisis de la Noticia" solo se usan como resumen cuando no hay una sección "Resumen".
+SINONIMOS_ENCABEZADOS = [
+    ("preguntas", r"preguntas(?: que se plantean(?: en el texto)?)?"),
+    ("hechos o evidencias", r"hechos(?: o evidencias)?(?: que sustentan el texto)?"),
+    ("conclusiones", r"conclusiones(?: escritas en la noticia)?"),
+    ("suposiciones implícitas", r"suposiciones(?: impl[ií]citas)?"),
+    ("palabras clave importantes", r"palabras clave importantes"),
+    ("palabras clave deducidas", r"palabras clave deducidas"),
+    ("sujetos importantes", r"sujetos importantes(?: mencionados)?"),
+    ("lugares físicos", r"lugares f[ií]sicos(?: mencionados)?"),
+    ("medios de información o sitios web", r"medios de informaci[oó]n(?: o sitios web)?(?: mencionados)?"),
+    ("resumen", r"resumen"),
+    ("_conclusion", r"conclusi[oó]n"),
+    ("_analisis", r"an[aá]lisis de la noticia"),
+]
+
+# Un solo patrón para todas las líneas de encabezado, compilado una vez. Cubre los formatos
+# "**Encabezado:**", "**Encabezado**:", "1. Encabezado:", "* **Encabezado**", "### Encabezado" y "Encabezado:".
+_RE_ENCABEZADO = re.compile(
+    r"^[ \t]*(?P<titulo>#{1,6}[ \t]*)?(?P<vineta>[*-][ \t]+)?(?P<numero>\d+\.[ \t]*)?(?P<negrita>\*\*)?[ \t]*(?:"
+    + "|".join(f"(?P<e{indice}>{patron})" for indice, (_, patron) in enumerate(SINONIMOS_ENCABEZADOS))
+    + r")(?!\w)(?P<cierre>[ \t]*(?:\*\*[ \t]*:?|:[ \t]*(?:\*\*)?))?",
+    re.MULTILINE | re.IGNORECASE
+)
+
+# Viñetas, números y letras al principio de cada elemento de una lista
+_RE_ELEMENTO = re.compile(r'(?:^|\n)\s*(?:\*|-|\d+\.|[a-z]\)|\(?\d+\)?)\s*(.*?)(?=\n|$)')
+
+CAMPOS_LISTA = [clave for clave, _ in SINONIMOS_ENCABEZADOS if clave not in ("resumen", "_conclusion", "_analisis")]
+
+
+# Función para decidir si una coincidencia es un encabezado. Devuelve "fuerte" si es título markdown o va
+# en negrita, "debil" si solo lleva dos puntos o número, y None si no es encabezado. Tras una viñeta o un
+# número, sin negrita ni título, solo cuenta si nada sigue a los dos puntos: "* Resumen: economía" o
+# "2. Conclusiones: ..." son elementos de una lista, no secciones.
+def _tipo_encabezado(coincidencia, texto):
+    if coincidencia.group("titulo") or coincidencia.group("negrita"):
+        return "fuerte"
+    if coincidencia.group("vineta") or coincidencia.group("numero"):
+        fin_linea = texto.find("\n", coincidencia.end())
+        resto = texto[coincidencia.end():fin_linea if fin_linea != -1 else len(texto)]
+        return "debil" if coincidencia.group("cierre") and not resto.strip() else None
+    return "debil" if coincidencia.group("cierre") else None
+
+
+# Función para dividir la respuesta en una sola pasada en (clave, cuerpo) por cada encabezado reconocido.
+# Si un encabezado se repite vale el primero, salvo que uno posterior en negrita o título markdown
+# reemplace a uno débil (solo con dos puntos o número).
+def dividir_secciones(texto):
+    secciones = {}
+    fuertes = set()
+    clave_actual = None
+    tipo_actual = None
+    inicio_cuerpo = 0
+
+    def cerrar_seccion(fin):
+        if clave_actual is None:
+            return
+        if clave_actual not in secciones or (tipo_actual == "fuerte" and clave_actual not in fuertes):
+            secciones[clave_actual] = texto[inicio_cuerpo:fin].strip()
+            if tipo_actual == "fuerte":
+                fuertes.add(clave_actual)
+
+    for coincidencia in _RE_ENCABEZADO.finditer(texto):
+        tipo = _tipo_encabezado(coincidencia, texto)
+        if tipo is None:
+            continue
+        cerrar_seccion(coincidencia.start())
+        clave_actual = next(clave for indice, (clave, _) in enumerate(SINONIMOS_ENCABEZADOS)
+                            if coincidencia.group(f"e{indice}") is not None)
+        tipo_actual = tipo
+        inicio_cuerpo = coincidencia.end()
+    cerrar_seccion(len(texto))
+    return secciones
+
+
+# Función para convertir el cuerpo de una sección en elementos, sin viñetas ni numeración
+def extraer_elementos(cuerpo):
+    if not cuerpo:
+        return []
+    elementos = _RE_ELEMENTO.findall(cuerpo)
+    # Si no hay viñetas, cada línea es un elemento
+    if not elementos:
+        elementos = [linea.strip() for linea in cuerpo.split('\n') if linea.strip()]
+    return [elemento for elemento in elementos if elemento]
+
+
+# Función para interpretar una respuesta en texto con secciones y devolver la evaluación
+def procesar_respuesta_secciones(respuesta):
+    secciones = dividir_secciones(respuesta)
+    evaluacion = {clave: extraer_elementos(secciones.get(clave)) for clave in CAMPOS_LISTA}
+    evaluacion["resumen"] = (secciones.get("resumen") or secciones.get("_conclusion")
+                             or secciones.get("_analisis") or "No evaluado")
+    return evaluacion
@@ -0,0 +1,123 @@
+import logging
+import os
+from collections import deque
+from datetime import datetime, timezone
+
+from almacen import fecha_iso
+
+logger = logging.getLogger(__name__)
+
+
+# Función para leer pesos con la forma "clave:peso,clave:peso" (por ejemplo "El reforma:2,La Jornada:0.5")
+def leer_pesos(texto):
+    pesos = {}
+    for entrada in (texto or "").split(','):
+        clave, separador, peso = entrada.rpartition(':')
+        if separador and clave.strip():
+            pesos[clave.strip().lower()] = float(peso)
+    return pesos
+
+
+def _fecha(noticia):
+    return leer_fecha(fecha_iso(noticia))
+
+
+# Función para convertir una fecha ISO 8601 en datetime con zona horaria (UTC si no la trae)
+def leer_fecha(fecha):
+    if not fecha:
+        return None
+    try:
+        fecha = datetime.fromisoformat(fecha)
+    except ValueError:
+        return None
+    return fecha if fecha.tzinfo else fecha.replace(tzinfo=timezone.utc)
+
+
+# Planificador de la cola de evaluación: ordena las noticias pendientes por prioridad para que las recientes
+# y de las fuentes y secciones preferidas se evalúen primero aunque haya un rezago grande.
+# La prioridad suma el peso de la fuente, el de la sección (`tema`, por coincidencia parcial), la recencia
+# (`peso_recencia` para la noticia más reciente, la mitad cada `vida_media_horas` de antigüedad respecto a ella)
+# y la longitud (`peso_longitud` a partir de `longitud_referencia` caracteres de texto).
+# Con `cuota_fuente` ninguna fuente ocupa más de esa fracción de cada ventana de `ventana` noticias, mientras
+# haya noticias de otras fuentes esperando.
+class PlanificadorPrioridad:
+    def __init__(self, pesos_fuente=None, pesos_tema=None, peso_recencia=3.0, vida_media_horas=24.0,
+                 peso_longitud=1.0, longitud_referencia=2000, cuota_fuente=None, ventana=20):
+        self.pesos_fuente = {clave.lower(): peso for clave, peso in (pesos_fuente or {}).items()}
+        self.pesos_tema = {clave.lower(): peso for clave, peso in (pesos_tema or {}).items()}
+        self.peso_recencia = peso_recencia
+        self.vida_media_horas = vida_media_horas
+        self.peso_longitud = peso_longitud
+        self.longitud_referencia = longitud_referencia
+        self.cuota_fuente = cuota_fuente
+        self.ventana = ventana
+
+    def prioridad(self, noticia, referencia=None):
+        puntuacion = self.pesos_fuente.get(noticia.get("fuente", "").lower(), 0.0)
+        tema = noticia.get("tema", "").lower()
+        puntuacion += sum(peso for clave, peso in self.pesos_tema.items() if clave in tema)
+
+        fecha = _fecha(noticia)
+        if fecha and referencia:
+            horas = max(0.0, (referencia - fecha).total_seconds() / 3600)
+            puntuacion += self.peso_recencia * 0.5 ** (horas / self.vida_media_horas)
+
+        texto = noticia.get("texto") or ""
+        puntuacion += self.peso_longitud * min(1.0, len(texto) / self.longitud_referencia)
+        return puntuacion
+
+    # Función para devolver las noticias en el orden en que se deben evaluar. La recencia se mide respecto a
+    # `referencia` (datetime de la noticia pendiente más reciente) o, si no se pasa, a la más reciente de
+    # `noticias`; al ordenar por bloques conviene pasarla para que todos usen la misma.
+    def ordenar(self, noticias, referencia=None):
+        if referencia is None:
+            fechas = [fecha for fecha in map(_fecha, noticias) if fecha]
+            referencia = max(fechas) if fechas else None
+        # El orden de llegada desempata, para que el resultado sea estable entre ejecuciones
+        ordenadas = sorted(noticias, key=lambda noticia: -self.prioridad(noticia, referencia))
+        if not self.cuota_fuente or self.cuota_fuente >= 1:
+            return ordenadas
+        return self._repartir(ordenadas)
+
+    # Toma siempre la noticia de mayor prioridad entre las fuentes que no agotaron su cuota en la ventana;
+    # si todas las que quedan la agotaron, empieza una ventana nueva
+    def _repartir(self, ordenadas):
+        maximo = max(1, int(self.cuota_fuente * self.ventana))
+        colas = {}
+        for posicion, noticia in enumerate(ordenadas):
+            colas.setdefault(noticia.get("fuente", ""), deque()).append((posicion, noticia))
+
+        resultado = []
+        usadas = {}
+        en_ventana = 0
+        while colas:
+            disponibles = [fuente for fuente in colas if usadas.get(fuente, 0) < maximo]
+            if not disponibles or en_ventana >= self.ventana:
+                usadas = {}
+                en_ventana = 0
+                continue
+            fuente = min(disponibles, key=lambda fuente: colas[fuente][0][0])
+            resultado.append(colas[fuente].popleft()[1])
+            if not colas[fuente]:
+                del colas[fuente]
+            usadas[fuente] = usadas.get(fuente, 0) + 1
+            en_ventana += 1
+        return resultado
+
+
+# Función para crear el planificador con la configuración del archivo .env; con PRIORIDAD=0 devuelve None
+# y las noticias se evalúan en el orden del almacén
+def crear_planificador(**opciones):
+    if os.getenv('PRIORIDAD', '1') != '1':
+        return None
+    configuracion = {
+        "pesos_fuente": leer_pesos(os.getenv('PRIORIDAD_FUENTES')),
+        "pesos_tema": leer_pesos(os.getenv('PRIORIDAD_TEMAS')),
+        "peso_recencia": float(os.getenv('PRIORIDAD_PESO_RECENCIA', '3')),
+        "vida_media_horas": float(os.getenv('PRIORIDAD_VIDA_MEDIA_HORAS', '24')),
+        "peso_longitud": float(os.getenv('PRIORIDAD_PESO_LONGITUD', '1')),
+        "cuota_fuente": float(os.getenv('CUOTA_FUENTE', '0.5')) or None,
+        "ventana": int(os.getenv('VENTANA_CUOTA', '20')),
+    }
+    configuracion.update(opciones)
+    return PlanificadorPrioridad(**configuracion)
@@ -0,0 +1,92 @@
+import math
+import re
+
+from extractor_texto import extraer_parrafos
+
+# Estimador calibrado para español con el tokenizador de Llama 3: ~1.4 tokens por palabra y uno por signo
+TOKENS_POR_PALABRA = 1.4
+_RE_PALABRAS = re.compile(r'\w+')
+_RE_SIGNOS = re.compile(r'[^\w\s]')
+
+# Se deja de parsear el HTML cuando ya hay este múltiplo del presupuesto en párrafos candidatos
+FACTOR_EXTRACCION = 3
+# Caracteres por token aproximados, para que el extractor corte sin estimar tokens en cada párrafo
+CARACTERES_POR_TOKEN = 4
+
+# Comillas que suelen marcar citas textuales en las notas
+_RE_CITA = re.compile(r'[“”«»"]')
+_RE_CIFRA = re.compile(r'\d')
+
+
+def estimar_tokens(texto):
+    return math.ceil(len(_RE_PALABRAS.findall(texto)) * TOKENS_POR_PALABRA + len(_RE_SIGNOS.findall(texto)))
+
+
+# Función para recortar un párrafo por palabras hasta que quepa en el presupuesto
+def recortar_parrafo(parrafo, presupuesto_tokens):
+    recorte = []
+    usados = 0
+    for palabra in parrafo.split():
+        usados += estimar_tokens(palabra)
+        if usados > presupuesto_tokens:
+            break
+        recorte.append(palabra)
+    return " ".join(recorte) + "..."
+
+
+# Función para elegir los párrafos más informativos dentro del presupuesto:
+# primero la entrada de la nota, luego los párrafos con citas textuales y cifras, en su orden original.
+def seleccionar_parrafos(parrafos, presupuesto_tokens, fraccion_entrada=0.6):
+    costos = [estimar_tokens(parrafo) for parrafo in parrafos]
+    if sum(costos) <= presupuesto_tokens:
+        return parrafos
+
+    elegidos = set()
+    usados = 0
+    for indice, costo in enumerate(costos):
+        if usados + costo > presupuesto_tokens * fraccion_entrada:
+            break
+        elegidos.add(indice)
+        usados += costo
+
+    # La entrada nunca queda vacía: el primer párrafo entra completo si cabe, o recortado si no
+    if not elegidos:
+        if costos[0] > presupuesto_tokens:
+            return [recortar_parrafo(parrafos[0], presupuesto_tokens)]
+        elegidos.add(0)
+        usados = costos[0]
+
+    def puntaje(indice):
+        parrafo = parrafos[indice]
+        return 2 * bool(_RE_CITA.search(parrafo)) + bool(_RE_CIFRA.search(parrafo))
+
+    candidatos = sorted((indice for indice in range(len(parrafos)) if indice not in elegidos),
+                        key=lambda indice: (-puntaje(indice), indice))
+    for indice in candidatos:
+        if usados + costos[indice] <= presupuesto_tokens:
+            elegidos.add(indice)
+            usados += costos[indice]
+
+    return [parrafos[indice] for indice in sorted(elegidos)]
+
+
+# Función para obtener el texto de una noticia dentro de un presupuesto de tokens.
+# El HTML se parsea solo hasta reunir FACTOR_EXTRACCION veces el presupuesto, no el documento completo.
+def extraer_con_presupuesto(html, presupuesto_tokens=400):
+    parrafos = extraer_parrafos(html, presupuesto_tokens * FACTOR_EXTRACCION * CARACTERES_POR_TOKEN)
+    return "\n".join(seleccionar_parrafos(parrafos, presupuesto_tokens))
+
+
+# Función equivalente para el texto plano que cleaningJson.py guarda junto al HTML (un párrafo por línea)
+def texto_con_presupuesto(texto, presupuesto_tokens=400):
+    parrafos = [parrafo for parrafo in texto.split("\n") if parrafo]
+    return "\n".join(seleccionar_parrafos(parrafos, presupuesto_tokens))
+
+
+# Función para obtener el texto de la noticia que se envía al modelo: la entrada y los párrafos con citas
+# y cifras que quepan en el presupuesto. Usa el texto que cleaningJson.py ya extrajo; los archivos
+# normalizados con versiones anteriores solo traen el HTML y se parsean hasta reunir suficiente texto.
+def contenido_noticia(noticia, presupuesto_tokens=400):
+    if noticia.get("texto") is not None:
+        return texto_con_presupuesto(noticia["texto"], presupuesto_tokens)
+    return extraer_con_presupuesto(noticia["contenido"], presupuesto_tokens)
@@ -0,0 +1,84 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+
+from almacen import crear_almacen
+from estrategias import obtener_estrategia
+
+logger = logging.getLogger(__name__)
+
+# Respuestas por tarea enviada a cada proceso; bloques grandes reparten mejor el costo de serializar
+TAMANO_BLOQUE = 64
+
+
+# Función que interpreta un bloque de respuestas con el parser de una estrategia; se ejecuta en un proceso aparte
+def _reprocesar_bloque(version_parser, bloque):
+    procesar = obtener_estrategia(version_parser).interpretar
+    evaluaciones = {}
+    fallidas = 0
+    for clave, respuesta, tipo in bloque:
+        try:
+            evaluaciones[clave] = procesar(respuesta, tipo)
+        except Exception:
+            fallidas += 1
+    return evaluaciones, fallidas
+
+
+def _bloques(elementos, tamano):
+    elementos = iter(elementos)
+    while True:
+        bloque = list(islice(elementos, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+# Función para volver a interpretar las respuestas guardadas de una versión sin consultar al modelo.
+# `version_parser` elige el parser (por defecto el de la misma versión) y `destino` la versión con la
+# que se guardan las evaluaciones nuevas (por defecto la misma, que se sobrescribe).
+def reprocesar_respuestas(version, modelo='llama3.2', version_parser=None, destino=None, procesos=None, almacen=None):
+    version_parser = version_parser or version
+    destino = destino or version
+    obtener_estrategia(version_parser)
+    propio = almacen is None
+    almacen = almacen or crear_almacen()
+
+    inicio = time.perf_counter()
+    total = 0
+    fallidas = 0
+    try:
+        with ProcessPoolExecutor(max_workers=procesos or os.cpu_count() or 1) as executor:
+            bloques = _bloques(almacen.iterar_respuestas(version, modelo), TAMANO_BLOQUE)
+            for evaluaciones, fallidas_bloque in executor.map(_reprocesar_bloque, repeat(version_parser), bloques):
+                almacen.reemplazar_evaluaciones(evaluaciones, destino, modelo)
+                total += len(evaluaciones)
+                fallidas += fallidas_bloque
+    finally:
+        if propio:
+            almacen.cerrar()
+
+    duracion = time.perf_counter() - inicio
+    logger.info(f"{total} respuestas de la versión {version} reprocesadas con el parser {version_parser} "
+                f"y guardadas como {destino} en {duracion:.2f} s ({fallidas} fallidas)")
+    return total, fallidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reprocesa las respuestas guardadas del modelo con un parser, sin volver a consultarlo")
+    parser.add_argument('version', help="versión de la estrategia cuyas respuestas se reprocesan")
+    parser.add_argument('--parser', default=None, help="versión de la estrategia cuyo parser se usa (por defecto la misma)")
+    parser.add_argument('--destino', default=None, help="versión con la que se guardan las evaluaciones (por defecto la misma)")
+    parser.add_argument('--modelo', default='llama3.2')
+    parser.add_argument('--procesos', type=int, default=None)
+    argumentos = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    reprocesar_respuestas(argumentos.version, argumentos.modelo, argumentos.parser, argumentos.destino, argumentos.procesos)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
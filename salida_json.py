@@ -0,0 +1,90 @@
+import json
+
+# Campos de la evaluación (los mismos de generar_evaluacion_vacia) y si son lista o texto
+CAMPOS_EVALUACION = {
+    "preguntas": list,
+    "hechos o evidencias": list,
+    "conclusiones": list,
+    "suposiciones implícitas": list,
+    "palabras clave importantes": list,
+    "palabras clave deducidas": list,
+    "sujetos importantes": list,
+    "lugares físicos": list,
+    "medios de información o sitios web": list,
+    "resumen": str
+}
+
+# Esquema JSON de una evaluación, para el parámetro `format` de Ollama (salida restringida)
+ESQUEMA_EVALUACION = {
+    "type": "object",
+    "properties": {
+        campo: {"type": "array", "items": {"type": "string"}} if tipo is list else {"type": "string"}
+        for campo, tipo in CAMPOS_EVALUACION.items()
+    },
+    "required": list(CAMPOS_EVALUACION)
+}
+
+# Esquema para el modo por lotes: un objeto con un arreglo de evaluaciones identificadas por número
+ESQUEMA_LOTE = {
+    "type": "object",
+    "properties": {
+        "noticias": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": dict(ESQUEMA_EVALUACION["properties"], id={"type": "integer"}),
+                "required": ["id"] + ESQUEMA_EVALUACION["required"]
+            }
+        }
+    },
+    "required": ["noticias"]
+}
+
+
+# Función para describir los campos esperados dentro del prompt (Ollama recomienda pedirlo también en texto)
+def instrucciones_json():
+    campos = ", ".join(
+        f'"{campo}" ({"lista de textos" if tipo is list else "texto"})'
+        for campo, tipo in CAMPOS_EVALUACION.items()
+    )
+    return f"Responde únicamente con un objeto JSON con los campos: {campos}.\n"
+
+
+# Función para normalizar un objeto de la respuesta a la forma de una evaluación
+def normalizar_evaluacion(objeto):
+    evaluacion = {}
+    for campo, tipo in CAMPOS_EVALUACION.items():
+        valor = objeto.get(campo)
+        if tipo is list:
+            if isinstance(valor, str):
+                valor = [valor]
+            elif not isinstance(valor, list):
+                valor = []
+            evaluacion[campo] = [str(elemento).strip() for elemento in valor if str(elemento).strip()]
+        else:
+            evaluacion[campo] = str(valor).strip() if valor else "No evaluado"
+    return evaluacion
+
+
+# Función para interpretar una respuesta en modo JSON en una sola pasada, validando contra el esquema.
+# Lanza ValueError si la respuesta no es un objeto JSON con al menos un campo de la evaluación.
+def procesar_respuesta_json(respuesta):
+    try:
+        objeto = json.loads(respuesta)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"La respuesta no es JSON válido: {e}")
+    if not isinstance(objeto, dict):
+        raise ValueError("La respuesta JSON no es un objeto")
+
+    presentes = [campo for campo in CAMPOS_EVALUACION if campo in objeto]
+    if not presentes:
+        raise ValueError("La respuesta JSON no contiene ningún campo de la evaluación")
+    for campo in presentes:
+        tipo = CAMPOS_EVALUACION[campo]
+        valor = objeto[campo]
+        if tipo is list and not (isinstance(valor, list) or isinstance(valor, str)):
+            raise ValueError(f"El campo '{campo}' debería ser una lista")
+        if tipo is str and not isinstance(valor, (str, type(None))):
+            raise ValueError(f"El campo '{campo}' debería ser texto")
+
+    return normalizar_evaluacion(objeto)
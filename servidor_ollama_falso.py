@@ -0,0 +1,289 @@
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Encabezados con los que llama3.2 suele responder al prompt de evaluacion0.5.py
+ENCABEZADOS_RESPUESTA = {
+    "preguntas": "Preguntas que se plantean en el texto",
+    "hechos o evidencias": "Hechos o evidencias que sustentan el texto",
+    "conclusiones": "Conclusiones escritas en la noticia",
+    "suposiciones implícitas": "Suposiciones implícitas",
+    "palabras clave importantes": "Palabras clave importantes",
+    "palabras clave deducidas": "Palabras clave deducidas",
+    "sujetos importantes": "Sujetos importantes mencionados",
+    "lugares físicos": "Lugares físicos mencionados",
+    "medios de información o sitios web": "Medios de información o sitios web mencionados",
+    "resumen": "Resumen"
+}
+
+RESPUESTA_POR_DEFECTO = (
+    "**Resumen:** La noticia describe un hecho reciente.\n"
+    "**Palabras clave importantes:**\n* México\n* Gobierno\n"
+)
+
+
+# Función para reconstruir una respuesta en texto a partir de una evaluación guardada
+def evaluacion_a_respuesta(evaluacion):
+    partes = []
+    for clave, encabezado in ENCABEZADOS_RESPUESTA.items():
+        valor = evaluacion.get(clave)
+        if isinstance(valor, list) and valor:
+            # Las evaluaciones antiguas a veces contienen el encabezado siguiente como elemento
+            elementos = [elemento for elemento in valor if not elemento.startswith('**')]
+            partes.append(f"**{encabezado}:**\n" + "\n".join(f"* {elemento}" for elemento in elementos))
+        elif isinstance(valor, str) and valor and valor != "No evaluado":
+            partes.append(f"**{encabezado}:** {valor}")
+    return "\n\n".join(partes)
+
+
+# Evaluaciones grabadas de llama3.2 (las del formato actual de clean/noticias_con_evaluacion*.json) que usan el
+# servidor falso y benchmark_parser.py. Están en un archivo propio que el pipeline nunca escribe, para que
+# las respuestas no cambien de una ejecución a otra.
+RUTA_EVALUACIONES_GRABADAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'evaluaciones_grabadas.json')
+
+
+# Función para cargar las evaluaciones grabadas; `ruta` permite usar otro archivo con la misma forma
+def cargar_evaluaciones_grabadas(ruta=RUTA_EVALUACIONES_GRABADAS):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as file:
+            evaluaciones = json.load(file)
+    except (json.JSONDecodeError, OSError):
+        return []
+    return [evaluacion for evaluacion in evaluaciones if isinstance(evaluacion, dict) and tiene_contenido(evaluacion)]
+
+
+# Función para saber si una evaluación grabada tiene algún campo con contenido real (no "No evaluado" ni vacío)
+def tiene_contenido(evaluacion):
+    for clave in ENCABEZADOS_RESPUESTA:
+        valor = evaluacion.get(clave)
+        if isinstance(valor, list) and any(isinstance(elemento, str) and elemento.strip() for elemento in valor):
+            return True
+        if isinstance(valor, str) and valor.strip() and valor != "No evaluado":
+            return True
+    return False
+
+
+# Función para cargar respuestas en texto reconstruidas a partir de las evaluaciones grabadas
+def cargar_respuestas_grabadas(ruta=RUTA_EVALUACIONES_GRABADAS):
+    evaluaciones = cargar_evaluaciones_grabadas(ruta)
+    respuestas = [respuesta for respuesta in map(evaluacion_a_respuesta, evaluaciones) if respuesta]
+    return respuestas or [RESPUESTA_POR_DEFECTO]
+
+
+# Función para responder en modo JSON (`format`): un objeto por noticia, o {"noticias": [...]} si el prompt es un lote
+def respuesta_json(evaluacion, prompt):
+    objeto = {
+        clave: [elemento for elemento in valor if not elemento.startswith('**')] if isinstance(valor, list) else valor
+        for clave, valor in evaluacion.items() if clave in ENCABEZADOS_RESPUESTA
+    }
+    numeros = re.findall(r'^\[Noticia (\d+)\]', prompt, re.MULTILINE)
+    if numeros:
+        return json.dumps({"noticias": [dict(objeto, id=int(numero)) for numero in numeros]}, ensure_ascii=False)
+    return json.dumps(objeto, ensure_ascii=False)
+
+
+# Servidor HTTP que no llena la salida de trazas cuando el cliente cierra una conexión keep-alive
+class _ServidorHTTP(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+# Servidor HTTP local que imita /api/generate de Ollama (NDJSON en streaming).
+# Permite medir el pipeline sin un modelo real, con ritmo de tokens, latencia y tasa de errores configurables.
+# La evaluación del prompt cuesta según los tokens que no comparten prefijo con la solicitud anterior,
+# como ocurre con la caché KV de Ollama. Con `paralelo` solo se atienden esas solicitudes a la vez
+# (OLLAMA_NUM_PARALLEL) y el resto espera en cola; con `cola_maxima` las que no caben reciben 503
+# (OLLAMA_MAX_QUEUE).
+class ServidorOllamaFalso:
+    def __init__(self, host='127.0.0.1', puerto=0, tokens_por_segundo=200.0, latencia=0.05,
+                 tasa_errores=0.0, respuestas=None, semilla=0, tokens_prompt_por_segundo=2000.0,
+                 paralelo=None, cola_maxima=None):
+        self.tokens_por_segundo = tokens_por_segundo
+        self.tokens_prompt_por_segundo = tokens_prompt_por_segundo
+        self.latencia = latencia
+        self.tasa_errores = tasa_errores
+        self.respuestas = respuestas or cargar_respuestas_grabadas()
+        self.evaluaciones = cargar_evaluaciones_grabadas() or [{"resumen": "La noticia describe un hecho reciente."}]
+        self.cola_maxima = cola_maxima
+        self.solicitudes = 0
+        self.errores = 0
+        self.rechazadas = 0
+        self._lugares = threading.Semaphore(paralelo) if paralelo else None
+        self._en_cola = 0
+        self._aleatorio = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._ultimo_prompt = ""
+        self._servidor = _ServidorHTTP((host, puerto), self._crear_manejador())
+        self._hilo = None
+
+    @property
+    def url_base(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    @property
+    def url(self):
+        return f"{self.url_base}/api/generate"
+
+    # Función para atender solicitudes en el hilo actual hasta que se llame a detener()
+    def servir(self):
+        self._servidor.serve_forever()
+
+    # Función para atender solicitudes en un hilo en segundo plano
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self.servir, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *excepcion):
+        self.detener()
+
+    # Función para decidir si esta solicitud falla, según la tasa de errores configurada
+    def _debe_fallar(self):
+        with self._lock:
+            self.solicitudes += 1
+            falla = self._aleatorio.random() < self.tasa_errores
+            if falla:
+                self.errores += 1
+            return falla
+
+    # Función para esperar un lugar libre; devuelve False si la cola está llena
+    def _entrar(self):
+        if self._lugares is None:
+            return True
+        with self._lock:
+            if self.cola_maxima is not None and self._en_cola >= self.cola_maxima:
+                self.rechazadas += 1
+                return False
+            self._en_cola += 1
+        self._lugares.acquire()
+        with self._lock:
+            self._en_cola -= 1
+        return True
+
+    def _salir(self):
+        if self._lugares is not None:
+            self._lugares.release()
+
+    # Función para calcular cuántos tokens del prompt hay que evaluar: los que siguen al prefijo común
+    # con la solicitud anterior (el resto ya está en la caché KV)
+    def _tokens_sin_cache(self, prompt):
+        with self._lock:
+            anterior, self._ultimo_prompt = self._ultimo_prompt, prompt
+        comun = 0
+        for a, b in zip(anterior, prompt):
+            if a != b:
+                break
+            comun += 1
+        return (len(prompt) - comun) // 4
+
+    # La misma solicitud recibe siempre la misma respuesta grabada; en modo JSON se responde con la evaluación
+    def _elegir_respuesta(self, payload):
+        huella = int.from_bytes(hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).digest()[:4], 'big')
+        if payload.get("format"):
+            return respuesta_json(self.evaluaciones[huella % len(self.evaluaciones)], payload.get("prompt", ""))
+        return self.respuestas[huella % len(self.respuestas)]
+
+    def _crear_manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _enviar_json(self, estado, datos):
+                cuerpo = json.dumps(datos).encode('utf-8')
+                self.send_response(estado)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def _enviar_fragmento(self, datos):
+                linea = (json.dumps(datos, ensure_ascii=False) + "\n").encode('utf-8')
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(linea), linea))
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path.startswith('/api/tags'):
+                    self._enviar_json(200, {"models": [{"name": "llama3.2:latest"}]})
+                else:
+                    self._enviar_json(200, {"status": "Ollama is running"})
+
+            def do_POST(self):
+                longitud = int(self.headers.get('Content-Length', 0))
+                try:
+                    payload = json.loads(self.rfile.read(longitud) or b'{}')
+                except json.JSONDecodeError:
+                    self._enviar_json(400, {"error": "invalid JSON"})
+                    return
+
+                if not self.path.startswith('/api/generate'):
+                    self._enviar_json(404, {"error": "not found"})
+                    return
+                if servidor._debe_fallar():
+                    self._enviar_json(503, {"error": "server busy"})
+                    return
+                if not servidor._entrar():
+                    self._enviar_json(503, {"error": "server busy, please try again. maximum pending requests exceeded"})
+                    return
+                try:
+                    self._generar(payload)
+                finally:
+                    servidor._salir()
+
+            def _generar(self, payload):
+                inicio = time.perf_counter()
+                prompt = (payload.get("system") or "") + payload.get("prompt", "")
+                time.sleep(servidor.latencia + servidor._tokens_sin_cache(prompt) / servidor.tokens_prompt_por_segundo)
+                respuesta = servidor._elegir_respuesta(payload)
+                tokens = re.findall(r'\S+\s*|\s+', respuesta)
+                prompt_eval = time.perf_counter() - inicio
+
+                estadisticas = {
+                    "prompt_eval_count": max(1, len(prompt) // 4),
+                    "prompt_eval_duration": int(prompt_eval * 1e9),
+                    "eval_count": len(tokens)
+                }
+
+                if payload.get("stream") is False:
+                    time.sleep(len(tokens) / servidor.tokens_por_segundo)
+                    estadisticas["eval_duration"] = int((time.perf_counter() - inicio - prompt_eval) * 1e9)
+                    estadisticas["total_duration"] = int((time.perf_counter() - inicio) * 1e9)
+                    self._enviar_json(200, dict(model=payload.get("model"), response=respuesta, done=True, **estadisticas))
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                pausa = 1.0 / servidor.tokens_por_segundo
+                for token in tokens:
+                    time.sleep(pausa)
+                    self._enviar_fragmento({"model": payload.get("model"), "response": token, "done": False})
+                estadisticas["eval_duration"] = int((time.perf_counter() - inicio - prompt_eval) * 1e9)
+                estadisticas["total_duration"] = int((time.perf_counter() - inicio) * 1e9)
+                self._enviar_fragmento(dict(model=payload.get("model"), response="", done=True, **estadisticas))
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Manejador
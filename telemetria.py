@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from motor_evaluacion import percentil
+
+logger = logging.getLogger(__name__)
+
+NANOSEGUNDOS = 1e9
+
+
+# Función para construir el registro de métricas de una llamada al modelo.
+# `estadisticas` son los campos del fragmento final de Ollama (duraciones en nanosegundos).
+def crear_registro(id_noticia, prompt, duracion, estado_http, estadisticas=None, error=None, host=None):
+    estadisticas = estadisticas or {}
+    tokens_salida = estadisticas.get("eval_count")
+    duracion_eval = estadisticas.get("eval_duration")
+    if tokens_salida and duracion_eval:
+        tokens_por_segundo = tokens_salida / (duracion_eval / NANOSEGUNDOS)
+    elif tokens_salida and duracion:
+        tokens_por_segundo = tokens_salida / duracion
+    else:
+        tokens_por_segundo = None
+
+    return {
+        "timestamp": time.time(),
+        "noticia": id_noticia,
+        "prompt_caracteres": len(prompt),
+        "prompt_tokens": estadisticas.get("prompt_eval_count"),
+        "tokens_salida": tokens_salida,
+        "tiempo_primer_token_s": _redondear(estadisticas.get("tiempo_primer_token_s")),
+        "prompt_eval_s": _redondear(_segundos(estadisticas.get("prompt_eval_duration"))),
+        "eval_s": _redondear(_segundos(duracion_eval)),
+        "tokens_por_segundo": _redondear(tokens_por_segundo),
+        "duracion_s": _redondear(duracion),
+        "estado_http": estado_http,
+        "error": error,
+        "host": host
+    }
+
+
+def _segundos(nanosegundos):
+    return nanosegundos / NANOSEGUNDOS if nanosegundos is not None else None
+
+
+def _redondear(valor):
+    return round(valor, 4) if valor is not None else None
+
+
+# Registro de métricas por llamada: cada registro se añade a un archivo JSONL en cuanto llega
+# y se conserva lo mínimo en memoria para el resumen del final de la ejecución.
+class RegistroMetricas:
+    def __init__(self, ruta='./metricas/llamadas_ollama.jsonl'):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._inicio = time.perf_counter()
+        self._duraciones = []
+        self._primer_token = []
+        self._prompt_eval = []
+        self._tokens_salida = 0
+        self._tokens_prompt = 0
+        self._errores = 0
+        # Llamadas por servidor cuando API_URL tiene varios
+        self._por_host = {}
+
+    def registrar(self, registro):
+        linea = json.dumps(registro, ensure_ascii=False) + "\n"
+        with self._lock:
+            directorio = os.path.dirname(self.ruta)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            with open(self.ruta, 'a', encoding='utf-8') as file:
+                file.write(linea)
+
+            if registro.get("host"):
+                self._por_host[registro["host"]] = self._por_host.get(registro["host"], 0) + 1
+            if registro["estado_http"] != 200 or registro["error"]:
+                self._errores += 1
+                return
+            self._duraciones.append(registro["duracion_s"])
+            if registro["tiempo_primer_token_s"] is not None:
+                self._primer_token.append(registro["tiempo_primer_token_s"])
+            if registro["prompt_eval_s"] is not None:
+                self._prompt_eval.append(registro["prompt_eval_s"])
+            self._tokens_salida += registro["tokens_salida"] or 0
+            self._tokens_prompt += registro["prompt_tokens"] or 0
+
+    # Función para resumir la ejecución: percentiles de latencia y tokens/s agregados
+    def resumen(self):
+        with self._lock:
+            duraciones = sorted(self._duraciones)
+            primer_token = sorted(self._primer_token)
+            prompt_eval = self._prompt_eval
+            transcurrido = time.perf_counter() - self._inicio
+            return {
+                "llamadas": len(duraciones) + self._errores,
+                "errores": self._errores,
+                "latencia_p50_s": _redondear(percentil(duraciones, 50)),
+                "latencia_p95_s": _redondear(percentil(duraciones, 95)),
+                "latencia_p99_s": _redondear(percentil(duraciones, 99)),
+                "primer_token_p50_s": _redondear(percentil(primer_token, 50)),
+                "primer_token_p95_s": _redondear(percentil(primer_token, 95)),
+                "prompt_eval_medio_s": _redondear(sum(prompt_eval) / len(prompt_eval)) if prompt_eval else None,
+                "tokens_prompt": self._tokens_prompt,
+                "tokens_salida": self._tokens_salida,
+                "tokens_por_segundo_agregado": _redondear(self._tokens_salida / transcurrido) if transcurrido > 0 else None,
+                "duracion_total_s": _redondear(transcurrido),
+                "llamadas_por_host": dict(self._por_host)
+            }
+
+    # Función para escribir el resumen junto al archivo de métricas y mostrarlo en el log;
+    # `adicionales` son otras secciones de la ejecución (por ejemplo el triaje) que se guardan con él
+    def guardar_resumen(self, **adicionales):
+        resumen = self.resumen()
+        resumen.update({clave: valor for clave, valor in adicionales.items() if valor is not None})
+        ruta_resumen = os.path.splitext(self.ruta)[0] + '_resumen.json'
+        directorio = os.path.dirname(ruta_resumen)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with open(ruta_resumen, 'w', encoding='utf-8') as file:
+            json.dump(resumen, file, ensure_ascii=False, indent=2)
+        logger.info(f"Resumen de llamadas al modelo: {resumen}")
+        return resumen
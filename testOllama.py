@@ -4,6 +4,7 @@ import random
 import json
 import textwrap
 from dotenv import load_dotenv
+from cliente_ollama import crear_cliente
 
 # Cargar variables de entorno del archivo .env
 load_dotenv()
@@ -11,6 +12,9 @@ load_dotenv()
 # Obtener la URL de la API desde el archivo .env
 api_url = os.getenv("API_URL")
 
+# Cliente con pool de conexiones; timeout de 10 segundos para conectar y para leer
+cliente = crear_cliente(api_url, timeout_conexion=10, timeout_lectura=10)
+
 # Función para obtener la pregunta del usuario
 def obtener_pregunta_usuario():
     return input("Escribe una pregunta para el modelo: ")
@@ -58,7 +62,7 @@ def hacer_solicitud_api():
         }
 
         # Hacer la solicitud POST a la API con timeout de 10 segundos
-        response = requests.post(api_url, json=payload, timeout=10)
+        response = cliente.post(payload)
 
         # Verificar si la solicitud fue exitosa (status code 200)
         response.raise_for_status()  # Esto lanzará un error si el código no es 200
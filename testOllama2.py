@@ -1,4 +1,4 @@
-import requests
+from cliente_ollama import crear_cliente
 
 # URL de la API (asegúrate de cambiarla por la correcta)
 api_url = "https://api.llama.com/v1/completions"
@@ -43,7 +43,8 @@ payload = {
 }
 
 # Hacemos la solicitud a la API
-response = requests.post(api_url, json=payload)
+cliente = crear_cliente(api_url)
+response = cliente.post(payload)
 
 # Imprimimos la respuesta de la API
 print(response.json())
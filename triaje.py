@@ -0,0 +1,149 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+
+from extractor_texto import texto_noticia
+
+logger = logging.getLogger(__name__)
+
+# Versión de la extracción de términos; forma parte de la clave de las frecuencias guardadas en el almacén,
+# así que hay que subirla al cambiar `terminos` o PALABRAS_VACIAS
+VERSION_TERMINOS = "1"
+
+# Contenido que cleaningJson.py pone cuando la noticia no trae cuerpo
+CONTENIDOS_VACIOS = {"", "contenido no disponible"}
+
+# Palabras vacías del español que no cuentan para la relevancia
+PALABRAS_VACIAS = set("""
+a al algo algunas algunos ante antes como con contra cual cuando de del desde donde dos el ella ellas ellos
+en entre era es esa esas ese eso esos esta estaba estado estas este esto estos fue fueron ha han hasta hay la
+las le les lo los mas me mientras muy no nos o otra otras otro otros para pero por porque que quien se sea
+ser si sido sin sobre son su sus tambien tiene todo todos tras un una uno unos y ya
+""".split())
+
+_RE_TERMINO = re.compile(r'[^\W\d_]{3,}')
+
+
+def terminos(texto):
+    return {termino for termino in _RE_TERMINO.findall(texto.lower()) if termino not in PALABRAS_VACIAS}
+
+
+# Triaje local antes del modelo: descarta las noticias que no vale la pena evaluar (sin cuerpo, una sola
+# línea, texto repetido) y las de relevancia baja. La relevancia es la suma del IDF de los términos distintos
+# del texto, calculado sobre el corpus: crece con la cantidad de información propia de la noticia y no con
+# las palabras que comparten todas. Las palabras clave configuradas pesan `peso_palabras_clave` veces más.
+class Triaje:
+    def __init__(self, min_caracteres=120, min_palabras=15, umbral=40.0, palabras_clave=(), peso_palabras_clave=5.0):
+        self.min_caracteres = min_caracteres
+        self.min_palabras = min_palabras
+        self.umbral = umbral
+        self.palabras_clave = {palabra.lower() for palabra in palabras_clave}
+        self.peso_palabras_clave = peso_palabras_clave
+        self.revisadas = 0
+        self.motivos = Counter()
+
+    # Función para contar en cuántas noticias del corpus aparece cada término; devuelve (frecuencias, total).
+    # Recorre `corpus` una vez sin guardarlo, así que puede ser un generador del almacén.
+    def frecuencias(self, corpus):
+        frecuencias = Counter()
+        total = 0
+        for noticia in corpus:
+            frecuencias.update(terminos(texto_noticia(noticia)))
+            total += 1
+        return frecuencias, total
+
+    # Función para obtener las frecuencias de las noticias del almacén que cumplen `filtros`: las guardadas
+    # en el almacén si las hay (se borran al entrar noticias nuevas) o, si no, las calcula y las guarda
+    def frecuencias_almacen(self, almacen, filtros):
+        clave = f"{VERSION_TERMINOS}|{json.dumps(filtros, sort_keys=True, default=str)}"
+        guardadas = almacen.cargar_frecuencias(clave)
+        if guardadas:
+            logger.debug(f"Frecuencias del triaje leídas del almacén ({guardadas[1]} noticias)")
+            return Counter(guardadas[0]), guardadas[1]
+        frecuencias, total = self.frecuencias(almacen.iterar_noticias(**filtros))
+        almacen.guardar_frecuencias(clave, frecuencias, total)
+        return frecuencias, total
+
+    # Función para separar las noticias que se envían al modelo de las omitidas.
+    # `corpus` son las noticias sobre las que se calcula el IDF (por defecto las mismas); conviene pasar
+    # todo el almacén para que la puntuación no dependa de cuántas quedaron pendientes. Para filtrar por
+    # bloques se pasan una vez las `frecuencias` (frecuencias, total) y el conjunto `vistos` de textos ya
+    # revisados, que se comparte entre bloques para detectar los repetidos.
+    # Devuelve (aceptadas, omitidas); cada omitida es (noticia, motivo).
+    def filtrar(self, noticias, corpus=None, frecuencias=None, vistos=None):
+        textos = [texto_noticia(noticia) for noticia in noticias]
+        conjuntos = [terminos(texto) for texto in textos]
+        if frecuencias is not None:
+            frecuencias, total = frecuencias
+        elif corpus is None:
+            frecuencias = Counter(termino for conjunto in conjuntos for termino in conjunto)
+            total = len(noticias)
+        else:
+            frecuencias, total = self.frecuencias(corpus)
+
+        aceptadas = []
+        omitidas = []
+        vistos = set() if vistos is None else vistos
+        for noticia, texto, conjunto in zip(noticias, textos, conjuntos):
+            motivo = self._motivo(noticia, texto, conjunto, frecuencias, total, vistos)
+            if motivo:
+                omitidas.append((noticia, motivo))
+                self.motivos[motivo.split(" (")[0]] += 1
+            else:
+                aceptadas.append(noticia)
+        self.revisadas += len(noticias)
+        return aceptadas, omitidas
+
+    def _motivo(self, noticia, texto, conjunto, frecuencias, total, vistos):
+        if texto.lower() in CONTENIDOS_VACIOS or not conjunto:
+            return "sin contenido"
+        if texto.lower() == noticia.get("titulo", "").strip().lower():
+            return "solo título"
+        if len(texto) < self.min_caracteres or len(texto.split()) < self.min_palabras:
+            return f"texto corto ({len(texto)} caracteres)"
+
+        # Notas de sección con el mismo texto bajo distintas URL
+        huella = hashlib.sha1(" ".join(texto.lower().split()).encode('utf-8')).digest()
+        if huella in vistos:
+            return "texto repetido"
+        vistos.add(huella)
+
+        puntuacion = self.relevancia(conjunto, frecuencias, total)
+        if puntuacion < self.umbral:
+            return f"relevancia baja ({puntuacion:.1f})"
+        return None
+
+    # IDF suavizado, como el de scikit-learn: log((1 + N) / (1 + df)) + 1, nunca menor que 1
+    def relevancia(self, conjunto, frecuencias, total):
+        puntuacion = 0.0
+        for termino in conjunto:
+            idf = math.log((1 + total) / (1 + frecuencias[termino])) + 1
+            puntuacion += idf * (self.peso_palabras_clave if termino in self.palabras_clave else 1)
+        return puntuacion
+
+    def resumen(self):
+        omitidas = sum(self.motivos.values())
+        return {
+            "revisadas": self.revisadas,
+            "omitidas": omitidas,
+            "tasa_omision": round(omitidas / self.revisadas, 4) if self.revisadas else 0.0,
+            "motivos": dict(self.motivos)
+        }
+
+
+# Función para crear el triaje con la configuración del archivo .env; con TRIAJE=0 devuelve None
+def crear_triaje(**opciones):
+    if os.getenv('TRIAJE', '1') != '1':
+        return None
+    configuracion = {
+        "min_caracteres": int(os.getenv('TRIAJE_MIN_CARACTERES', '120')),
+        "min_palabras": int(os.getenv('TRIAJE_MIN_PALABRAS', '15')),
+        "umbral": float(os.getenv('TRIAJE_UMBRAL', '40')),
+        "palabras_clave": [palabra.strip() for palabra in os.getenv('TRIAJE_PALABRAS_CLAVE', '').split(',') if palabra.strip()],
+    }
+    configuracion.update(opciones)
+    return Triaje(**configuracion)